@@ -0,0 +1,99 @@
+"""Instant fakes of the LLMs and the search backend, so benchmarks measure the
+app itself. Importing this module imports `src`, so set up the environment
+first."""
+
+import json
+import re
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from src.search import SearchBackend, SearchResult
+
+_TOPIC_ID = re.compile(r'"id": "(\w+)"')
+
+REPORT = " ".join(["Lorem ipsum dolor sit amet, consectetur adipiscing elit."] * 80)
+
+
+class FakeChatModel(BaseChatModel):
+    """Answers tool calls with canned arguments and everything else with text."""
+
+    queries: list[str] = ["first query", "second query", "third query"]
+    text: str = REPORT
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools])
+
+    def _message(self, messages, tools: list[dict] | None) -> AIMessage:
+        if not tools:
+            return AIMessage(content=self.text)
+        name = tools[0]["function"]["name"]
+        args = {
+            "TopicSafetyCheck": {"is_safe": True, "violated_category": None},
+            "TopicSafetyChecks": {
+                "checks": [
+                    {"id": id_, "is_safe": True, "violated_category": None}
+                    for id_ in _TOPIC_ID.findall(messages[-1].content)
+                ]
+            },
+            "SearchQueries": {"queries": self.queries},
+            "ReportOutline": {
+                "title": "Report",
+                "sections": [
+                    {"heading": f"Section {n}", "description": "Findings"}
+                    for n in range(1, 4)
+                ],
+            },
+        }[name]
+        return AIMessage(
+            content="",
+            tool_calls=[{"name": name, "args": args, "id": "call"}],
+        )
+
+    def _generate(self, messages, stop=None, run_manager=None, tools=None, **kwargs):
+        return ChatResult(
+            generations=[ChatGeneration(message=self._message(messages, tools))]
+        )
+
+    async def _astream(
+        self, messages, stop=None, run_manager=None, tools=None, **kwargs
+    ):
+        if tools:
+            message = self._message(messages, tools)
+            call = message.tool_calls[0]
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(
+                    content="",
+                    tool_call_chunks=[
+                        {
+                            "name": call["name"],
+                            "args": json.dumps(call["args"]),
+                            "id": call["id"],
+                            "index": 0,
+                        }
+                    ],
+                )
+            )
+            return
+        for word in self.text.split(" "):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+
+
+class FakeSearchBackend(SearchBackend):
+    """Returns the same results for every query."""
+
+    def __init__(self, content: str = REPORT, results: int = 5):
+        self._content = content
+        self._results = results
+
+    async def asearch(self, query: str) -> list[SearchResult]:
+        return [
+            SearchResult(url=f"https://example.com/{n}", content=self._content)
+            for n in range(self._results)
+        ]
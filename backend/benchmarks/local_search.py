@@ -0,0 +1,100 @@
+"""Benchmarks the local BM25 search backend: indexing time, incremental update
+time, query latency and resident memory, on a synthetic corpus.
+
+Usage:
+    python -m benchmarks.local_search [--files 2000] [--queries 1000]
+"""
+
+import argparse
+import random
+import statistics
+import string
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.search.bm25 import BM25Index
+from src.search.index import IndexWriter
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def _write_corpus(
+    corpus: Path, files: int, vocabulary: list[str], rng: np.random.Generator
+) -> None:
+    # Zipf-distributed words, like natural language
+    ranks = np.minimum(rng.zipf(1.2, size=files * 1_000), len(vocabulary)) - 1
+    for n in range(files):
+        words = [vocabulary[r] for r in ranks[n * 1_000 : (n + 1) * 1_000]]
+        paragraphs = [" ".join(words[i : i + 100]) for i in range(0, len(words), 100)]
+        (corpus / f"doc-{n:06d}.md").write_text("\n\n".join(paragraphs))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=2_000)
+    parser.add_argument("--queries", type=int, default=1_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    seed = random.Random(0)
+    vocabulary = [
+        "".join(seed.choices(string.ascii_lowercase, k=seed.randint(3, 10)))
+        for _ in range(50_000)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus, index_path = Path(tmp) / "corpus", Path(tmp) / "index"
+        corpus.mkdir()
+        _write_corpus(corpus, args.files, vocabulary, rng)
+
+        writer = IndexWriter(index_path)
+        start = time.perf_counter()
+        writer.update(corpus)
+        print(f"indexed {args.files:,} files in {time.perf_counter() - start:.1f}s")
+
+        for file in sorted(corpus.iterdir())[: max(args.files // 100, 1)]:
+            file.write_text(file.read_text() + "\n\nupdated")
+        start = time.perf_counter()
+        stats = writer.update(corpus)
+        print(
+            f"updated {stats['updated']} files in {time.perf_counter() - start:.2f}s, "
+            f"{stats['segments']} segments"
+        )
+
+        rss_before = _rss_mb()
+        index = BM25Index(index_path)
+        queries = [
+            " ".join(seed.choices(vocabulary[:5_000], k=seed.randint(2, 6)))
+            for _ in range(args.queries)
+        ]
+        index.search(queries[0], k=5)  # Loads the segments
+
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query, k=5)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        print(
+            f"query: mean {statistics.fmean(timings):.2f}ms, "
+            f"p50 {timings[len(timings) // 2]:.2f}ms, "
+            f"p99 {timings[int(len(timings) * 0.99)]:.2f}ms"
+        )
+        index_mb = sum(f.stat().st_size for f in index_path.rglob("*")) / 2**20
+        print(
+            f"index size {index_mb:.0f}MB, "
+            f"RSS growth {_rss_mb() - rss_before:.0f}MB after queries"
+        )
+
+
+if __name__ == "__main__":
+    main()
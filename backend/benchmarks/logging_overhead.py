@@ -0,0 +1,57 @@
+"""Benchmarks the event loop time spent per log call in each logging mode, for
+enabled (INFO) and disabled (DEBUG) log calls. Log output goes to /dev/null.
+
+Usage:
+    python -m benchmarks.logging_overhead [--calls 20000]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import logging
+import os
+import time
+
+from src.config import configure_logging
+
+_TOPIC = "The impact of large language models on scientific research " * 4
+
+
+async def _measure(logger: logging.Logger, level: int, calls: int) -> float:
+    """Returns the mean microseconds per log call on the event loop thread."""
+    start = time.perf_counter()
+    for n in range(calls):
+        logger.log(level, "[Benchmark] Research %d for topic: '%s'.", n, _TOPIC)
+        if n % 100 == 0:
+            # Yield to the loop, like a node between log calls
+            await asyncio.sleep(0)
+    return (time.perf_counter() - start) * 1e6 / calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=20_000)
+    args = parser.parse_args()
+
+    logger = logging.getLogger("src.benchmark")
+    with (
+        open(os.devnull, "w") as devnull,
+        contextlib.redirect_stdout(devnull),
+        contextlib.redirect_stderr(devnull),
+    ):
+        results = []
+        for mode in ("development", "production"):
+            configure_logging(mode)
+            for name, level in (("enabled", logging.INFO), ("disabled", logging.DEBUG)):
+                results.append(
+                    (mode, name, asyncio.run(_measure(logger, level, args.calls)))
+                )
+            # Let the listener drain the queue before the next mode
+            time.sleep(1)
+
+    for mode, name, micros in results:
+        print(f"{mode:>11} {name:>8}: {micros:.2f}us/call")
+
+
+if __name__ == "__main__":
+    main()
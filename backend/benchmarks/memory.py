@@ -0,0 +1,123 @@
+"""Benchmarks the peak resident memory per concurrent research run.
+
+LLMs and web search are replaced with instant fakes returning large documents,
+and runs are traced to a local sink server at the given sample rate, as the app
+traces all runs by default. Each concurrency level runs in a fresh process.
+Reads the rest of the environment from `.env`, like the app. Usage:
+    python -m benchmarks.memory [--concurrency 1 10 50] [--queries 5] [--doc-kb 20]
+        [--sample-rate 1]
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import subprocess
+import sys
+from unittest import mock
+
+from benchmarks.sink import start_sink
+
+
+def _status_kb(field: str) -> int:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1])
+    raise KeyError(field)
+
+
+def _measure(
+    concurrency: int, queries: int, doc_kb: int, sample_rate: float
+) -> dict[str, float]:
+    """Returns the resident memory before and at the peak of concurrent runs,
+    including the submission of their traces."""
+    # Tracing is configured from the environment when `src` is imported.
+    os.environ["LANGCHAIN_TRACING_V2"] = "true"
+    os.environ["LANGCHAIN_ENDPOINT"] = start_sink()
+    os.environ["LANGCHAIN_TRACING_SAMPLE_RATE"] = str(sample_rate)
+    os.environ["APP_TOPIC_CACHE_SIZE"] = "0"
+
+    from langchain_core.tracers.langchain import wait_for_all_tracers
+    from langsmith.run_trees import get_cached_client
+
+    from benchmarks.fakes import FakeChatModel, FakeSearchBackend
+    from src.graph import ResearchGraph
+
+    def flush_traces() -> None:
+        wait_for_all_tracers()
+        if (queue := get_cached_client().tracing_queue) is not None:
+            queue.join()
+
+    llm = FakeChatModel(queries=[f"query {n}" for n in range(queries)])
+    content = " ".join(f"word{n % 5000}" for n in range(doc_kb * 1024 // 9))
+    search = FakeSearchBackend(content=content, results=5)
+
+    async def run(graph: ResearchGraph, topic: str) -> None:
+        async for _ in graph.astream(topic=topic, query_count=queries):
+            pass
+
+    async def run_all(graph: ResearchGraph) -> None:
+        await asyncio.gather(*(run(graph, f"topic {n}") for n in range(concurrency)))
+
+    with (
+        mock.patch("src.graph.graph.get_routed_llm", lambda *_, **__: llm),
+        mock.patch("src.graph.graph.get_search_backend", lambda _: search),
+    ):
+        graph = ResearchGraph()
+        asyncio.run(run(graph, "warm up"))
+        flush_traces()
+        gc.collect()
+        # Resets the peak resident memory to the current one
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        baseline = _status_kb("VmRSS")
+        asyncio.run(run_all(graph))
+        flush_traces()
+        peak = _status_kb("VmHWM")
+    return {"baseline_mb": baseline / 1024, "peak_mb": peak / 1024}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--queries", type=int, default=5)
+    parser.add_argument("--doc-kb", type=int, default=20)
+    parser.add_argument("--sample-rate", type=float, default=1.0)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        memory = _measure(
+            args.concurrency[0], args.queries, args.doc_kb, args.sample_rate
+        )
+        print(json.dumps(memory))
+        return
+
+    for concurrency in args.concurrency:
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.memory",
+                "--child",
+                f"--concurrency={concurrency}",
+                f"--queries={args.queries}",
+                f"--doc-kb={args.doc_kb}",
+                f"--sample-rate={args.sample_rate}",
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        memory = json.loads(result.stdout.splitlines()[-1])
+        growth = memory["peak_mb"] - memory["baseline_mb"]
+        print(
+            f"{concurrency:>4} concurrent runs: peak RSS {memory['peak_mb']:.0f}MB, "
+            f"+{growth:.0f}MB over baseline, {growth / concurrency:.2f}MB per run"
+        )
+
+
+if __name__ == "__main__":
+    main()
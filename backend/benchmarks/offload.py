@@ -0,0 +1,94 @@
+"""Measures the CPU time of the work nodes may run off the event loop, by input
+size, against the cost of handing work to a thread.
+
+Prompts are assembled from synthetic search docs, five per query, of the given
+total sizes. A research summary prompt is typically under 10K characters (five
+Tavily results), and a report prompt under 20K (one memo per query). Work that
+takes less than a few hand-offs is cheaper inline; `APP_PROMPT_OFFLOAD_CHARS`
+is set from these measurements. Usage:
+    python -m benchmarks.offload [--sizes 4000 64000 256000 1000000 4000000]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections.abc import Callable
+from typing import Any
+
+from benchmarks.fakes import FakeChatModel
+from src.graph.nodes.extractive_summary import ExtractiveSummaryNode
+from src.graph.nodes.report_writer import ReportWriterNode
+from src.graph.nodes.research_summary import ResearchSummaryNode
+
+_WORDS = ["the", "of", "model", "data", "research", "energy", "battery", "solar"]
+_WORDS += ["market", "growth", "policy", "climate", "jobs", "impact", "study"]
+_WORDS += ["results", "analysis", "report", "cost"]
+
+
+def _search_docs(chars: int, count: int = 5) -> list[str]:
+    """Returns `count` search docs of `chars` characters in total."""
+    rng = random.Random(0)
+    docs = []
+    for idx in range(count):
+        sentences: list[str] = []
+        while sum(map(len, sentences)) < chars // count:
+            words = rng.choices(_WORDS, k=rng.randint(8, 25))
+            sentences.append(" ".join(words) + ".")
+        content = " ".join(sentences)
+        docs.append(
+            f'<Document href="https://example.com/{idx}"/>\n{content}\n</Document>'
+        )
+    return docs
+
+
+def _time_ms(fn: Callable[..., Any], *args: Any, repeat: int = 5) -> float:
+    """Returns the mean wall time of a call, in ms, after a warm-up call."""
+    fn(*args)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(*args)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+async def _hand_off_ms(repeat: int = 1_000) -> float:
+    """Returns the mean round trip of an empty call through `asyncio.to_thread`."""
+    await asyncio.to_thread(int)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        await asyncio.to_thread(int)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[4_000, 64_000, 256_000, 1_000_000, 4_000_000],
+    )
+    args = parser.parse_args()
+
+    summary = ResearchSummaryNode(llm=FakeChatModel())
+    report = ReportWriterNode(llm=FakeChatModel())
+    extractive = ExtractiveSummaryNode()
+
+    print(f"Thread hand-off: {asyncio.run(_hand_off_ms()):.3f}ms")
+    print(
+        f"{'chars':>10} {'summary prompt':>15} {'report prompt':>14} {'extractive':>11}"
+    )
+    for size in args.sizes:
+        docs = _search_docs(size)
+        print(
+            f"{size:>10} "
+            f"{_time_ms(summary._format_prompt, 'query', docs):>13.3f}ms "
+            f"{_time_ms(report._format_prompt, 'topic', docs):>12.3f}ms "
+            f"{_time_ms(extractive._summarize, 'battery market', docs):>9.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
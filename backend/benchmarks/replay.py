@@ -0,0 +1,128 @@
+"""Replays recorded research runs offline and measures the app's CPU time,
+allocations and event timing, to compare versions on real traces.
+
+Record runs by setting `APP_CASSETTE_DIR`, then replay their cassettes. Upstream
+calls are answered from the cassettes with their recorded timing, scaled by
+`--time-scale` (0 replays without delays, isolating the app's CPU time). Save
+the results of one version with `--output`, and compare another version to them
+with `--baseline`. Safety checks of runs with a cassette are not micro-batched,
+so replays never exercise batched safety checks; `benchmarks.workers` measures
+them under concurrent load, with the fake models. Usage:
+    python -m benchmarks.replay CASSETTE... [--time-scale 1] [--runs 5]
+        [--output results.json] [--baseline results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any
+
+# Tracing, the topic cache and recording would skew the measurements.
+os.environ["LANGCHAIN_TRACING_V2"] = "false"
+os.environ["APP_TOPIC_CACHE_SIZE"] = "0"
+os.environ["APP_CASSETTE_DIR"] = ""
+
+from src.graph import ResearchGraph  # noqa: E402
+from src.graph.cassette import Cassette  # noqa: E402
+
+
+async def _replay(graph: ResearchGraph, cassette: Cassette) -> dict[str, float]:
+    """Replays a run, and returns the offset in ms of the first event of each
+    progress stage, the first report chunk and the end of the run."""
+    timings: dict[str, float] = {}
+    start = time.perf_counter()
+    async for event in graph.astream(**cassette.run, cassette=cassette):
+        offset = (time.perf_counter() - start) * 1000
+        match event["event"]:
+            case "progress":
+                timings.setdefault(event["data"]["content"], offset)
+            case "stream":
+                timings.setdefault("First report chunk", offset)
+            case "end":
+                timings["End"] = offset
+            case "error":
+                raise RuntimeError(event["data"]["content"])
+    return timings
+
+
+def _measure(
+    graph: ResearchGraph, path: Path, time_scale: float, runs: int
+) -> dict[str, Any]:
+    """Returns the median wall time, CPU time and event timing of the replayed
+    runs, and the peak allocations of an extra traced run."""
+    walls, cpus, events = [], [], []
+    misses = 0
+    for _ in range(runs):
+        cassette = Cassette.load(path, time_scale=time_scale)
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        events.append(asyncio.run(_replay(graph, cassette)))
+        walls.append((time.perf_counter() - wall_start) * 1000)
+        cpus.append((time.process_time() - cpu_start) * 1000)
+        misses = max(misses, cassette.misses)
+
+    # Allocations are traced in a separate run, as tracing slows the run down
+    cassette = Cassette.load(path, time_scale=0)
+    tracemalloc.start()
+    asyncio.run(_replay(graph, cassette))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "wall_ms": statistics.median(walls),
+        "cpu_ms": statistics.median(cpus),
+        "peak_alloc_kb": peak / 1024,
+        "events_ms": {
+            name: statistics.median(run[name] for run in events if name in run)
+            for name in events[0]
+        },
+        "misses": misses,
+    }
+
+
+def _compare(value: float, baseline: float | None) -> str:
+    if not baseline:
+        return ""
+    return f" ({(value - baseline) / baseline:+.1%})"
+
+
+def _print(name: str, result: dict[str, Any], baseline: dict[str, Any]) -> None:
+    print(f"{name}:")
+    for metric in ("wall_ms", "cpu_ms", "peak_alloc_kb"):
+        value = result[metric]
+        print(f"  {metric:<28}{value:>10.1f}{_compare(value, baseline.get(metric))}")
+    for event, value in result["events_ms"].items():
+        base = baseline.get("events_ms", {}).get(event)
+        print(f"  {event:<28}{value:>10.1f}{_compare(value, base)}")
+    if result["misses"]:
+        print(f"  {result['misses']} calls did not match their recorded request")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("cassettes", type=Path, nargs="+")
+    parser.add_argument("--time-scale", type=float, default=1.0)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    args = parser.parse_args()
+
+    baselines = json.loads(args.baseline.read_text()) if args.baseline else {}
+    graph = ResearchGraph()
+    results = {}
+    for path in args.cassettes:
+        results[path.name] = _measure(graph, path, args.time_scale, args.runs)
+        _print(path.name, results[path.name], baselines.get(path.name, {}))
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""A local LangSmith API sink, so benchmarks can trace runs without sending them
+anywhere. Does not import `src`, so it can be started before `src` reads the
+tracing environment."""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+
+class _SinkHandler(BaseHTTPRequestHandler):
+    """Accepts every LangSmith API request without doing anything."""
+
+    def _respond(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PATCH = _respond
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+
+def start_sink() -> str:
+    """Starts the sink in a background thread, returning its endpoint URL."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SinkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
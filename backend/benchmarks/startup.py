@@ -0,0 +1,72 @@
+"""Benchmarks cold start: import time of the app and time until `/health`
+first answers after launching uvicorn.
+
+Reads the environment from `.env`, like the app. Usage:
+    python -m benchmarks.startup [--runs 5] [--port 8765]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+_IMPORT_SCRIPT = (
+    "import time; start = time.perf_counter(); import src.api; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def _measure_import() -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", _IMPORT_SCRIPT],
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def _measure_health(port: int, timeout: float = 60.0) -> float:
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.api:app", "--port", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(
+                    f"http://127.0.0.1:{port}/health", timeout=1
+                ) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError("/health did not answer in time.")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    for name, measure in (
+        ("import src.api", _measure_import),
+        ("first /health", lambda: _measure_health(args.port)),
+    ):
+        timings = [measure() * 1000 for _ in range(args.runs)]
+        print(
+            f"{name:>14}: median {statistics.median(timings):.0f}ms, "
+            f"min {min(timings):.0f}ms, max {max(timings):.0f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Benchmarks topic cache lookups.
+
+Usage:
+    python -m benchmarks.topic_cache [--size 100000] [--lookups 2000]
+"""
+
+import argparse
+import random
+import statistics
+import string
+import time
+
+from src.graph.cache import CachedResearch, TopicCache
+
+
+def _random_topic(rng: random.Random, vocabulary: list[str]) -> str:
+    return " ".join(rng.sample(vocabulary, rng.randint(3, 8)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=2_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocabulary = [
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10)))
+        for _ in range(20_000)
+    ]
+    topics = [_random_topic(rng, vocabulary) for _ in range(args.size)]
+
+    cache = TopicCache(capacity=args.size)
+    start = time.perf_counter()
+    for topic in topics:
+        cache.add(
+            CachedResearch(topic=topic, query_count=2, queries=[], report="", run_id="")
+        )
+    print(f"indexed {len(cache):,} topics in {time.perf_counter() - start:.1f}s")
+
+    for name, queries in (
+        (
+            "hit",
+            [" ".join(reversed(t.split())) for t in rng.sample(topics, args.lookups)],
+        ),
+        ("miss", [_random_topic(rng, vocabulary) for _ in range(args.lookups)]),
+    ):
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            cache.lookup(query)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        print(
+            f"{name:>4}: mean {statistics.fmean(timings):.3f}ms, "
+            f"p50 {timings[len(timings) // 2]:.3f}ms, "
+            f"p99 {timings[int(len(timings) * 0.99)]:.3f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
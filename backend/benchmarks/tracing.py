@@ -0,0 +1,81 @@
+"""Benchmarks the CPU and latency overhead of LangSmith tracing per research run,
+at different trace sample rates.
+
+LLMs and web search are replaced with instant fakes and traces are sent to a
+local sink server, so the numbers isolate the tracing overhead. Reads the rest
+of the environment from `.env`, like the app. Usage:
+    python -m benchmarks.tracing [--runs 20] [--rates 0 0.1 1]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from unittest import mock
+
+from benchmarks.sink import start_sink
+
+# Tracing is configured from the environment when `src` is imported.
+os.environ["LANGCHAIN_TRACING_V2"] = "true"
+os.environ["LANGCHAIN_ENDPOINT"] = start_sink()
+os.environ["APP_TOPIC_CACHE_SIZE"] = "0"
+
+from langchain_core.tracers.langchain import wait_for_all_tracers  # noqa: E402
+from langsmith.run_trees import get_cached_client  # noqa: E402
+
+from benchmarks.fakes import FakeChatModel, FakeSearchBackend  # noqa: E402
+from src.config import settings  # noqa: E402
+from src.graph import ResearchGraph  # noqa: E402
+
+
+async def _run(graph: ResearchGraph, topic: str) -> None:
+    async for _ in graph.astream(topic=topic, query_count=3):
+        pass
+
+
+def _flush_traces() -> None:
+    wait_for_all_tracers()
+    if (queue := get_cached_client().tracing_queue) is not None:
+        queue.join()
+
+
+def _measure(rate: float, runs: int) -> tuple[list[float], float]:
+    """Returns the wall time of each run and the CPU time per run, including
+    the background trace submission."""
+    settings.LANGCHAIN_TRACING_SAMPLE_RATE = rate
+    graph = ResearchGraph()
+    asyncio.run(_run(graph, "warm up"))
+    _flush_traces()
+
+    timings = []
+    cpu_start = time.process_time()
+    for n in range(runs):
+        start = time.perf_counter()
+        asyncio.run(_run(graph, f"topic {n}"))
+        timings.append((time.perf_counter() - start) * 1000)
+    _flush_traces()
+    return timings, (time.process_time() - cpu_start) * 1000 / runs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--rates", type=float, nargs="+", default=[0.0, 0.1, 1.0])
+    args = parser.parse_args()
+
+    with (
+        mock.patch("src.graph.graph.get_routed_llm", lambda *_, **__: FakeChatModel()),
+        mock.patch("src.graph.graph.get_search_backend", lambda _: FakeSearchBackend()),
+    ):
+        for rate in args.rates:
+            timings, cpu = _measure(rate, args.runs)
+            print(
+                f"sample rate {rate:>4.0%}: cpu {cpu:.0f}ms/run, "
+                f"wall median {statistics.median(timings):.0f}ms, "
+                f"max {max(timings):.0f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""Benchmarks the research throughput of the API with 1 to N uvicorn workers.
+
+Each worker count runs the app under uvicorn, with instant fake LLMs and web
+search, so runs are bound by the app's own CPU time. Clients stream research
+runs concurrently for a fixed duration, cycling through a fixed number of
+distinct topics, so repeated topics are served from the topic cache, including
+results shared by other workers. All workers share the rate limits (set high
+enough never to block), in-flight runs and results through one SQLite
+database. Then a cold worker starts on a database holding `--shared-results`
+runs of other workers, and its first runs and event loop lag are measured,
+while it syncs the shared runs into its topic cache. Reads the rest of the
+environment from `.env`, like the app. Usage:
+    python -m benchmarks.workers [--workers 1 2 4] [--concurrency 32]
+        [--duration 20] [--topics 64] [--shared-results 10000]
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import httpx
+from dotenv import load_dotenv
+
+_PORT = 8765
+
+
+def __getattr__(name: str) -> Any:
+    """Returns the app with fake upstream calls, as `benchmarks.workers:app`,
+    importing it on first access in each uvicorn worker."""
+    if name != "app":
+        raise AttributeError(name)
+    from unittest import mock
+
+    from benchmarks.fakes import FakeChatModel, FakeSearchBackend
+
+    mock.patch(
+        "src.graph.graph.get_routed_llm", lambda *_, **__: FakeChatModel()
+    ).start()
+    mock.patch(
+        "src.graph.graph.get_search_backend", lambda _: FakeSearchBackend()
+    ).start()
+    from src.api.main import app
+
+    return app
+
+
+# Words of generated topics, distinct enough not to be near-duplicates
+_WORDS = ["solar", "forests", "oceans", "vaccines", "markets", "robots", "wheat"]
+_WORDS += ["glaciers", "cities", "bridges", "languages", "music", "chess"]
+
+
+def _topics(count: int) -> list[str]:
+    """Returns `count` distinct research topics."""
+    topics = [
+        f"impact of {first} on {second}"
+        for first, second in itertools.permutations(_WORDS, 2)
+    ]
+    return topics[:count]
+
+
+async def _client(
+    client: httpx.AsyncClient,
+    deadline: float,
+    counts: dict[str, int],
+    topics: list[str],
+) -> None:
+    """Streams research runs back to back until the deadline."""
+    while time.perf_counter() < deadline:
+        topic = topics[(counts["runs"] + counts["errors"]) % len(topics)]
+        async with client.stream(
+            "POST", "/research", json={"topic": topic}
+        ) as response:
+            async for _ in response.aiter_bytes():
+                pass
+        counts["runs" if response.status_code == 200 else "errors"] += 1
+
+
+async def _load(
+    concurrency: int, duration: float, topics: list[str]
+) -> dict[str, float]:
+    """Returns the completed runs per second under concurrent clients."""
+    async with httpx.AsyncClient(
+        base_url=f"http://127.0.0.1:{_PORT}",
+        headers={"X-API-Key": os.environ["APP_API_KEY"]},
+        timeout=None,
+        limits=httpx.Limits(max_connections=concurrency),
+    ) as client:
+        # Warms up every worker, which builds its graph on first use
+        warm_up = {"runs": 0, "errors": 0}
+        await asyncio.gather(
+            *(
+                _client(client, time.perf_counter() + 2, warm_up, topics)
+                for _ in range(concurrency)
+            )
+        )
+
+        counts = {"runs": 0, "errors": 0}
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(
+                _client(client, start + duration, counts, topics)
+                for _ in range(concurrency)
+            )
+        )
+        elapsed = time.perf_counter() - start
+    return {"runs_per_s": counts["runs"] / elapsed, "errors": counts["errors"]}
+
+
+def _wait_ready(server: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("The server exited during startup.")
+        try:
+            httpx.get(f"http://127.0.0.1:{_PORT}/health").raise_for_status()
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise TimeoutError("The server did not start in time.")
+
+
+@contextmanager
+def _serve(workers: int) -> Iterator[None]:
+    """Runs the app with the given number of workers until exited."""
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "benchmarks.workers:app",
+            "--port",
+            str(_PORT),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_ready(server)
+        yield
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def _measure(
+    workers: int, concurrency: int, duration: float, topics: list[str]
+) -> dict[str, float]:
+    """Runs the app with the given number of workers and loads it."""
+    with _serve(workers):
+        return asyncio.run(_load(concurrency, duration, topics))
+
+
+async def _seed_results(path: Path, count: int) -> None:
+    """Shares `count` completed runs of distinct topics, as another worker
+    would."""
+    from benchmarks.fakes import REPORT
+    from src.shared import SharedState
+
+    rng = random.Random(0)
+    shared_state = SharedState(path, max_results=count)
+    await shared_state.start()
+    try:
+        for idx in range(count):
+            words = (
+                "".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=8))
+                for _ in range(4)
+            )
+            await shared_state.add_result(
+                {
+                    "topic": " ".join(words),
+                    "query_count": 3,
+                    "queries": ["first query", "second query", "third query"],
+                    "report": REPORT,
+                    "run_id": f"seeded-{idx}",
+                    "fast": False,
+                }
+            )
+    finally:
+        await shared_state.stop()
+
+
+async def _first_runs(concurrency: int, topics: list[str]) -> dict[str, float]:
+    """Returns the latencies of the first concurrent runs, and the event loop
+    lag of the worker that served them."""
+    async with httpx.AsyncClient(
+        base_url=f"http://127.0.0.1:{_PORT}",
+        headers={"X-API-Key": os.environ["APP_API_KEY"]},
+        timeout=None,
+        limits=httpx.Limits(max_connections=concurrency),
+    ) as client:
+
+        async def _run(topic: str) -> float:
+            start = time.perf_counter()
+            async with client.stream(
+                "POST", "/research", json={"topic": topic}
+            ) as response:
+                async for _ in response.aiter_bytes():
+                    pass
+            return (time.perf_counter() - start) * 1000
+
+        latencies = await asyncio.gather(*(_run(topic) for topic in topics))
+        lag = (await client.get("/metrics")).json()["event_loop_lag"]
+    return {
+        "p50_ms": statistics.median(latencies),
+        "max_ms": max(latencies),
+        "lag_max_ms": lag["max_ms"],
+        "lag_p99_ms": lag["p99_ms"],
+    }
+
+
+def _measure_cold(
+    path: Path, shared_results: int, concurrency: int, topics: list[str]
+) -> dict[str, float]:
+    """Starts a cold worker on a database of shared runs of other workers and
+    measures its first runs, one per topic."""
+    asyncio.run(_seed_results(path, shared_results))
+    os.environ["APP_SHARED_STATE_PATH"] = str(path)
+    with _serve(1):
+        return asyncio.run(_first_runs(concurrency, topics))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--topics", type=int, default=64)
+    parser.add_argument("--shared-results", type=int, default=10_000)
+    args = parser.parse_args()
+
+    # Inherited by the workers, `src` reads the environment when imported
+    state_dir = Path(tempfile.mkdtemp())
+    os.environ["APP_LOG_MODE"] = "production"
+    os.environ["LANGCHAIN_TRACING_V2"] = "false"
+    os.environ["APP_RATE_LIMIT"] = str(10**9)
+    os.environ["APP_SHARED_STATE_PATH"] = str(state_dir / "shared_state.db")
+    os.environ["APP_REPORT_STORE_PATH"] = str(state_dir / "reports")
+    load_dotenv()
+
+    topics = _topics(args.topics)
+    print(
+        f"{os.cpu_count()} CPUs, {args.concurrency} concurrent clients, "
+        f"{len(topics)} topics"
+    )
+    baseline = None
+    for workers in args.workers:
+        result = _measure(workers, args.concurrency, args.duration, topics)
+        baseline = baseline or result["runs_per_s"]
+        print(
+            f"{workers:>2} workers: {result['runs_per_s']:.1f} runs/s "
+            f"({result['runs_per_s'] / baseline:.2f}x), {result['errors']} errors"
+        )
+
+    # A fresh database, so the cold worker's topics were never researched
+    cold = _measure_cold(
+        state_dir / "cold_state.db",
+        args.shared_results,
+        args.concurrency,
+        _topics(args.concurrency),
+    )
+    print(
+        f"Cold worker, {args.shared_results} shared runs: first runs "
+        f"p50 {cold['p50_ms']:.0f}ms, max {cold['max_ms']:.0f}ms, event loop lag "
+        f"p99 {cold['lag_p99_ms']:.1f}ms, max {cold['lag_max_ms']:.1f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
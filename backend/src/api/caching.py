@@ -0,0 +1,55 @@
+def negotiate_encoding(accept_encoding: str | None, available: tuple[str, ...]) -> str:
+    """Selects the content coding of a response from an `Accept-Encoding` header.
+
+    Args:
+        accept_encoding (str | None): The `Accept-Encoding` request header.
+        available (tuple[str, ...]): The available content codings, preferred
+            first.
+
+    Returns:
+        str: The available coding with the highest quality value, or "identity"
+            if none is acceptable. Ties go to the preferred coding.
+    """
+    if not accept_encoding:
+        return "identity"
+
+    qualities: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().lower().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.strip()] = quality
+
+    default = qualities.get("*", 0.0)
+    best, best_quality = "identity", 0.0
+    for coding in available:
+        quality = qualities.get(coding, default)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Returns whether an `If-None-Match` header matches an entity tag, using
+    the weak comparison it calls for.
+
+    Args:
+        if_none_match (str | None): The `If-None-Match` request header.
+        etag (str): The quoted entity tag of the current representation.
+
+    Returns:
+        bool: Whether the client's copy is current.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(",")
+    )
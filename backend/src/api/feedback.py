@@ -0,0 +1,264 @@
+import asyncio
+import contextlib
+import fcntl
+import json
+import logging
+import os
+import secrets
+from collections import deque
+from collections.abc import Callable
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from langsmith import AsyncClient as LangsmithClient
+
+logger = logging.getLogger(__name__)
+
+
+class FeedbackQueueFullError(Exception):
+    """Raised when feedback is submitted while the queue is full."""
+
+    pass
+
+
+class FeedbackQueue:
+    """In-process queue that submits feedback to LangSmith in batches.
+
+    Feedback is acknowledged as soon as it is queued and flushed once a batch is
+    full or the flush interval has passed. Failed submissions are retried on
+    later flushes, up to `max_attempts` times. Queued feedback is appended to a
+    local spool file, which is rewritten after every flush, so it survives
+    restarts.
+
+    Each queue, one per worker process, spools to its own file next to
+    `spool_path`, and holds an exclusive lock on it while running. On start, a
+    queue claims the spools no running queue holds, those of stopped or
+    crashed workers, so every spooled item is restored by exactly one worker.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], "LangsmithClient"],
+        feedback_key: str,
+        spool_path: Path,
+        *,
+        max_size: int = 10_000,
+        batch_size: int = 50,
+        flush_interval: float = 2.0,
+        max_attempts: int = 5,
+    ):
+        """Initializes the feedback queue.
+
+        Args:
+            client_factory (Callable[[], LangsmithClient]): Returns the LangSmith
+                client, called on first flush.
+            feedback_key (str): The LangSmith feedback key.
+            spool_path (Path): The spool file for queued feedback.
+            max_size (int): The maximum number of queued feedback items.
+            batch_size (int): The number of items that triggers a flush.
+            flush_interval (float): The maximum seconds between flushes.
+            max_attempts (int): The number of submissions before an item is
+                dropped.
+        """
+        self._client_factory = client_factory
+        self._feedback_key = feedback_key
+        self._spool_path = spool_path
+        self._max_size = max_size
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._max_attempts = max_attempts
+
+        self._items: deque[dict[str, Any]] = deque()
+        self._batch_ready = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+        # This queue's own spool, and the lock held on it while running
+        self._own_spool = spool_path.with_name(
+            f"{spool_path.name}.{secrets.token_hex(4)}"
+        )
+        self._own_lock: int | None = None
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    async def start(self) -> None:
+        """Claims the spooled feedback of stopped queues and starts the
+        background flushes."""
+        self._spool_path.parent.mkdir(parents=True, exist_ok=True)
+        self._own_lock = _lock(self._own_spool, blocking=True)
+        # Serializes claims, so concurrently starting workers split the spools
+        claim_lock = _lock(self._spool_path, blocking=True)
+        try:
+            claimed = self._claim_spools()
+        finally:
+            os.close(claim_lock)
+        if claimed:
+            logger.info(
+                "[FeedbackQueue] Restored %d spooled feedback items.", len(self._items)
+            )
+        self._task = asyncio.create_task(self._run())
+
+    def _claim_spools(self) -> bool:
+        """Restores the items of the spools no running queue holds, moving
+        them into this queue's spool.
+
+        Returns:
+            bool: Whether any spool was claimed.
+        """
+        claimed: list[tuple[Path, int | None]] = []
+        for spool in sorted(self._spool_path.parent.glob(f"{self._spool_path.name}*")):
+            if spool.suffix in (".tmp", ".lock") or spool == self._own_spool:
+                continue
+            # The spool of a single-process deployment has no lock of its own
+            lock = None
+            if spool != self._spool_path:
+                lock = _lock(spool, blocking=False)
+                if lock is None:
+                    continue  # Held by a running queue
+            with spool.open() as file:
+                self._items.extend(json.loads(line) for line in file if line.strip())
+            claimed.append((spool, lock))
+
+        # Claimed items are spooled again before their old spools are removed
+        self._write_spool()
+        for spool, lock in claimed:
+            spool.unlink()
+            if lock is not None:
+                _lock_path(spool).unlink(missing_ok=True)
+                os.close(lock)
+        return bool(claimed)
+
+    async def stop(self) -> None:
+        """Stops the background flushes, flushing the queued feedback once more.
+        Feedback that still could not be submitted stays in the spool file."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        while self._items:
+            submitted = len(self._items)
+            await self.flush()
+            if len(self._items) >= submitted:
+                break
+        if not self._items:
+            claim_lock = _lock(self._spool_path, blocking=True)
+            try:
+                self._own_spool.unlink(missing_ok=True)
+                _lock_path(self._own_spool).unlink(missing_ok=True)
+            finally:
+                os.close(claim_lock)
+        # Releases the spool, for the next queue to claim what is left in it
+        if self._own_lock is not None:
+            os.close(self._own_lock)
+            self._own_lock = None
+        logger.info(
+            "[FeedbackQueue] Stopped with %d feedback items spooled.", len(self._items)
+        )
+
+    def put(self, item: dict[str, Any]) -> None:
+        """Queues a feedback item.
+
+        Args:
+            item (dict[str, Any]): The `id`, `run_id` and `value` of the feedback.
+
+        Raises:
+            FeedbackQueueFullError: If the queue is full.
+        """
+        if len(self._items) >= self._max_size:
+            raise FeedbackQueueFullError("Feedback queue is full.")
+
+        item = {**item, "attempts": 0}
+        self._items.append(item)
+        with self._own_spool.open("a") as spool:
+            spool.write(json.dumps(item) + "\n")
+
+        if len(self._items) >= self._batch_size:
+            self._batch_ready.set()
+
+    async def _run(self) -> None:
+        while True:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(
+                    self._batch_ready.wait(), timeout=self._flush_interval
+                )
+            self._batch_ready.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("[FeedbackQueue] Error during feedback flush: %s", e)
+
+    async def _submit(self, item: dict[str, Any]) -> None:
+        await self._client_factory().create_feedback(
+            key=self._feedback_key,
+            run_id=item["run_id"],
+            value=item["value"],
+            id=item["id"],
+        )
+
+    async def flush(self) -> None:
+        """Submits up to one batch of queued feedback and rewrites the spool."""
+        async with self._flush_lock:
+            batch = [
+                self._items.popleft()
+                for _ in range(min(self._batch_size, len(self._items)))
+            ]
+            if not batch:
+                return
+
+            results = await asyncio.gather(
+                *(self._submit(item) for item in batch), return_exceptions=True
+            )
+            failed = 0
+            for item, result in zip(batch, results, strict=True):
+                if not isinstance(result, Exception):
+                    continue
+                failed += 1
+                item["attempts"] += 1
+                if item["attempts"] < self._max_attempts:
+                    self._items.append(item)
+                else:
+                    logger.error(
+                        "[FeedbackQueue] Dropping feedback '%s' after %d attempts: %s",
+                        item["id"],
+                        item["attempts"],
+                        result,
+                    )
+            logger.info(
+                "[FeedbackQueue] Submitted %d/%d feedback items, %d queued.",
+                len(batch) - failed,
+                len(batch),
+                len(self._items),
+            )
+
+            self._write_spool()
+            if len(self._items) >= self._batch_size:
+                self._batch_ready.set()
+
+    def _write_spool(self) -> None:
+        """Atomically replaces this queue's spool file with the queued items."""
+        tmp_path = self._own_spool.with_name(self._own_spool.name + ".tmp")
+        with tmp_path.open("w") as spool:
+            spool.writelines(json.dumps(item) + "\n" for item in self._items)
+        os.replace(tmp_path, self._own_spool)
+
+
+def _lock_path(spool: Path) -> Path:
+    return spool.with_name(spool.name + ".lock")
+
+
+def _lock(spool: Path, *, blocking: bool) -> int | None:
+    """Takes an exclusive lock on a spool, through its lock file, as spools are
+    replaced on every flush.
+
+    Returns:
+        int | None: The file descriptor holding the lock, or None if the lock
+            is held elsewhere and `blocking` is False.
+    """
+    fd = os.open(_lock_path(spool), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
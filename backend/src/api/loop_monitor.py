@@ -0,0 +1,113 @@
+import asyncio
+import contextlib
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class EventLoopMonitor:
+    """Measures how late the event loop runs its callbacks, and logs the stack
+    of the code blocking it.
+
+    A task sleeps `interval` seconds at a time; the lag is how much later than
+    scheduled it wakes up, as every callback ready before it has to finish
+    first. Lags of the last `window` samples are kept for percentiles. A
+    watchdog thread checks the task's heartbeat, and once the loop has not run
+    it for `slow_threshold` seconds, logs the loop thread's current stack, once
+    per stall.
+    """
+
+    def __init__(
+        self,
+        *,
+        interval: float = 0.05,
+        window: int = 1_200,
+        slow_threshold: float = 0.1,
+    ):
+        """Initializes the monitor.
+
+        Args:
+            interval (float): The seconds between lag samples.
+            window (int): The number of most recent lag samples kept.
+            slow_threshold (float): The seconds the loop may be blocked before
+                the blocking stack is logged.
+        """
+        self._interval = interval
+        self._slow_threshold = slow_threshold
+        self._lags: deque[float] = deque(maxlen=window)
+
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    async def start(self) -> None:
+        """Starts sampling the running loop and watching for stalls."""
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.create_task(self._run())
+        self._stopped.clear()
+        self._watchdog = threading.Thread(
+            target=self._watch, name="event-loop-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stops sampling and watching."""
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self._interval)
+            self._lags.append(max(loop.time() - start - self._interval, 0.0))
+            self._heartbeat = time.monotonic()
+
+    def _watch(self) -> None:
+        reported = None  # Heartbeat of the last stall reported
+        while not self._stopped.wait(self._interval):
+            heartbeat = self._heartbeat
+            stalled = time.monotonic() - heartbeat - self._interval
+            if stalled < self._slow_threshold or heartbeat == reported:
+                continue
+            reported = heartbeat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            logger.warning(
+                "[EventLoopMonitor] Event loop blocked for over %.0fms in:\n%s",
+                stalled * 1000,
+                "".join(traceback.format_stack(frame)) if frame else "unknown",
+            )
+
+    def metrics(self) -> dict[str, float | int]:
+        """Returns the maximum and percentile lags of the recent samples.
+
+        Returns:
+            dict[str, float | int]: The `max_ms`, `p50_ms`, `p95_ms` and
+                `p99_ms` lags, and the number of `samples`.
+        """
+        lags = sorted(self._lags) or [0.0]
+
+        def percentile(q: float) -> float:
+            # Nearest-rank percentile
+            return lags[min(int(q * len(lags)), len(lags) - 1)] * 1000
+
+        return {
+            "max_ms": lags[-1] * 1000,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "samples": len(self._lags),
+        }
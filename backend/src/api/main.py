@@ -1,26 +1,40 @@
+import asyncio
 import json
 import logging
+import uuid
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
-from typing import Annotated
+from pathlib import Path
+from typing import TYPE_CHECKING, Annotated
 
-from asgi_correlation_id import CorrelationIdMiddleware
+from asgi_correlation_id import CorrelationIdMiddleware, correlation_id
 from fastapi import Depends, FastAPI, HTTPException, Request, status
 from fastapi.exception_handlers import http_exception_handler
 from fastapi.middleware.cors import CORSMiddleware
-from langsmith import AsyncClient as LangsmithClient
-from starlette.responses import StreamingResponse
+from starlette.responses import Response, StreamingResponse
 
 from src.api.auth import get_api_key
+from src.api.caching import etag_matches, negotiate_encoding
+from src.api.feedback import FeedbackQueue, FeedbackQueueFullError
+from src.api.loop_monitor import EventLoopMonitor
 from src.api.middlewares import RateLimitMiddleware
 from src.api.schemas import (
     FeedbackRequest,
     FeedbackResponse,
     HealthCheckResponse,
+    MetricsResponse,
+    ReportResponse,
     ResearchRequest,
 )
 from src.config import configure_logging, settings
-from src.graph import ResearchGraph
+from src.reports import ReportStore
+from src.shared import SharedState
+
+# Imported lazily, on first use or in a startup thread, to keep cold starts fast.
+if TYPE_CHECKING:
+    from langsmith import AsyncClient as LangsmithClient
+
+    from src.graph import ResearchGraph
 
 logger = logging.getLogger(__name__)
 
@@ -29,11 +43,45 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     """Lifespan context manager to set up and clean up resources."""
     logger.info("[lifespan] Setting up application resources.")
-    configure_logging()
-    app.state.research_graph = ResearchGraph()
-    app.state.langsmith = LangsmithClient()
+    configure_logging(settings.APP_LOG_MODE)
+    app.state.research_graph = None
+    app.state.langsmith = None
+    app.state.report_store = ReportStore(Path(settings.APP_REPORT_STORE_PATH))
+    app.state.shared_state = SharedState(
+        Path(settings.APP_SHARED_STATE_PATH),
+        max_results=settings.APP_TOPIC_CACHE_SIZE,
+        lease=settings.APP_SHARED_STATE_LEASE,
+    )
+    await app.state.shared_state.start()
+    app.state.feedback_queue = FeedbackQueue(
+        client_factory=_get_langsmith,
+        feedback_key=settings.LANGCHAIN_FEEDBACK_KEY,
+        spool_path=Path(settings.APP_FEEDBACK_SPOOL_PATH),
+        max_size=settings.APP_FEEDBACK_QUEUE_SIZE,
+        batch_size=settings.APP_FEEDBACK_BATCH_SIZE,
+        flush_interval=settings.APP_FEEDBACK_FLUSH_INTERVAL,
+        max_attempts=settings.APP_FEEDBACK_MAX_ATTEMPTS,
+    )
+    await app.state.feedback_queue.start()
+    app.state.loop_monitor = EventLoopMonitor(
+        interval=settings.APP_LOOP_LAG_INTERVAL,
+        window=settings.APP_LOOP_LAG_WINDOW,
+        slow_threshold=settings.APP_LOOP_SLOW_THRESHOLD,
+    )
+    await app.state.loop_monitor.start()
+    # Built in a thread, so the app answers health checks right away, and the
+    # first research request only waits for what is left of the build.
+    app.state.research_graph_task = asyncio.create_task(
+        asyncio.to_thread(_create_research_graph)
+    )
+    app.state.research_graph_task.add_done_callback(_on_research_graph_built)
     yield
     logger.info("[lifespan] Cleaning up application resources.")
+    # Waits for the build thread, which cannot be cancelled
+    await asyncio.gather(app.state.research_graph_task, return_exceptions=True)
+    await app.state.loop_monitor.stop()
+    await app.state.feedback_queue.stop()
+    await app.state.shared_state.stop()
 
 
 app = FastAPI(
@@ -58,6 +106,45 @@ app.add_middleware(
 )
 
 
+def _create_research_graph() -> "ResearchGraph":
+    """Imports and builds the research graph. Blocking, run in a thread."""
+    from src.graph import ResearchGraph
+
+    research_graph = ResearchGraph(
+        report_store=app.state.report_store,
+        shared_state=app.state.shared_state,
+    )
+    research_graph.warm_up()
+    return research_graph
+
+
+def _on_research_graph_built(task: "asyncio.Task[ResearchGraph]") -> None:
+    """Keeps the research graph once built, or logs its build error, once."""
+    if task.cancelled():
+        return
+    if (e := task.exception()) is not None:
+        logger.error("[lifespan] Unable to build the research graph: %r", e)
+        return
+    app.state.research_graph = task.result()
+    logger.info("[lifespan] Research graph built.")
+
+
+async def _get_research_graph() -> "ResearchGraph":
+    """Returns the research graph, waiting for its build started at startup."""
+    if app.state.research_graph is None:
+        app.state.research_graph = await app.state.research_graph_task
+    return app.state.research_graph
+
+
+def _get_langsmith() -> "LangsmithClient":
+    """Returns the LangSmith client, creating it on first use."""
+    if app.state.langsmith is None:
+        from langsmith import AsyncClient as LangsmithClient
+
+        app.state.langsmith = LangsmithClient()
+    return app.state.langsmith
+
+
 @app.exception_handler(HTTPException)
 async def handle_http_exception(request: Request, exc: HTTPException):
     """Handle HTTP exceptions.
@@ -71,19 +158,53 @@ async def handle_http_exception(request: Request, exc: HTTPException):
     Returns:
         HTTPException: The HTTP exception.
     """
-    logger.error(f"HTTPException: {exc.status_code}, {exc.detail}")
+    logger.error("HTTPException: %s, %s", exc.status_code, exc.detail)
     return await http_exception_handler(request, exc)
 
 
-@app.get("/health", response_model=HealthCheckResponse)
-async def health():
-    """Endpoint to check the health status of the application."""
+@app.get(
+    "/health",
+    response_model=HealthCheckResponse,
+    responses={
+        status.HTTP_503_SERVICE_UNAVAILABLE: {
+            "model": HealthCheckResponse,
+            "description": "The research graph is not built yet, or its build failed.",
+        }
+    },
+)
+async def health(response: Response):
+    """Endpoint to check the health status of the application. The application
+    is ready once the research graph, built in the background at startup,
+    exists."""
     logger.info("[/health] Health check request received.")
-    return HealthCheckResponse(status="ok")
+    task: asyncio.Task = app.state.research_graph_task
+    if not task.done():
+        health_status = "starting"
+    elif task.cancelled() or task.exception() is not None:
+        health_status = "failed"
+    else:
+        return HealthCheckResponse(status="ok")
+    response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return HealthCheckResponse(status=health_status)
+
+
+@app.get("/metrics", response_model=MetricsResponse)
+async def metrics(api_key: Annotated[str, Depends(get_api_key)]):
+    """Endpoint to inspect LLM routing choices and backend statistics, runs in
+    progress, and the event loop lag."""
+    research_graph: ResearchGraph | None = app.state.research_graph
+    shared_state: SharedState = app.state.shared_state
+    loop_monitor: EventLoopMonitor = app.state.loop_monitor
+    return MetricsResponse(
+        llm_routes=research_graph.get_llm_metrics() if research_graph else {},
+        in_flight_runs=await shared_state.in_flight_runs(),
+        event_loop_lag=loop_monitor.metrics(),
+    )
 
 
 async def _handle_stream(request: ResearchRequest) -> AsyncGenerator[str, None]:
-    """Handles streaming events from the research graph.
+    """Handles streaming events from the research graph. The run is registered
+    as in flight in the shared state until the stream ends.
 
     Args:
         request (ResearchRequest): The research request.
@@ -91,11 +212,23 @@ async def _handle_stream(request: ResearchRequest) -> AsyncGenerator[str, None]:
     Yields:
         str: Server-Sent Events formatted string.
     """
-    research_graph: ResearchGraph = app.state.research_graph
-    async for event in research_graph.astream(
-        topic=request.topic, query_count=request.query_count
-    ):
-        yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+    research_graph = await _get_research_graph()
+    shared_state: SharedState = app.state.shared_state
+    request_id = correlation_id.get() or str(uuid.uuid4())
+    await shared_state.start_run(request_id, request.topic)
+    try:
+        async for event in research_graph.astream(
+            topic=request.topic,
+            query_count=request.query_count,
+            fast=request.fast,
+            stream_queries=request.stream_queries,
+            trace=request.trace,
+            adaptive=request.adaptive,
+            sectioned=request.sectioned,
+        ):
+            yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+    finally:
+        await shared_state.finish_run(request_id)
 
 
 @app.post("/research", response_class=StreamingResponse)
@@ -103,28 +236,75 @@ async def research(
     request: ResearchRequest, api_key: Annotated[str, Depends(get_api_key)]
 ):
     """Endpoint to conduct research based on the given topic and stream the report."""
-    logger.info(f"[/research] Streaming research for topic: '{request.topic}'.")
+    logger.info("[/research] Streaming research for topic: '%s'.", request.topic)
     return StreamingResponse(_handle_stream(request), media_type="text/event-stream")
 
 
-@app.post("/feedback", response_model=FeedbackResponse)
+@app.get(
+    "/reports/{run_id}",
+    response_model=ReportResponse,
+    responses={status.HTTP_304_NOT_MODIFIED: {"description": "Not modified."}},
+)
+async def report(
+    run_id: uuid.UUID,
+    request: Request,
+    api_key: Annotated[str, Depends(get_api_key)],
+):
+    """Endpoint to retrieve a completed run by the run ID of its end event.
+    Reports never change, so clients revalidate them with `If-None-Match`."""
+    report_store: ReportStore = app.state.report_store
+    encodings = report_store.stored_encodings(str(run_id))
+    if not encodings:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Report not found."
+        )
+
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"), encodings)
+    # Strong entity tags differ between content codings of the same report.
+    etag = f'"{run_id}"' if encoding == "identity" else f'"{run_id}-{encoding}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={settings.APP_REPORT_MAX_AGE}",
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    content = await report_store.read(str(run_id), encoding)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    logger.info("[/reports] Serving report of run '%s' (%s).", run_id, encoding)
+    return Response(content=content, media_type="application/json", headers=headers)
+
+
+@app.post(
+    "/feedback",
+    response_model=FeedbackResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
 async def feedback(
     request: FeedbackRequest, api_key: Annotated[str, Depends(get_api_key)]
 ):
-    """Endpoint to provide feedback on the research report."""
+    """Endpoint to provide feedback on the research report.
+    Feedback is queued and submitted to LangSmith in the background."""
     logger.info(
-        f"[/feedback] Feedback request received for run ID: " f"'{request.run_id}'."
+        "[/feedback] Feedback request received for run ID: '%s'.", request.run_id
     )
-    langsmith: LangsmithClient = app.state.langsmith
+    feedback_queue: FeedbackQueue = app.state.feedback_queue
+    feedback_id = uuid.uuid4()
 
     try:
-        feedback = await langsmith.create_feedback(
-            key=settings.LANGCHAIN_FEEDBACK_KEY, **request.model_dump()
+        feedback_queue.put(
+            {
+                "id": str(feedback_id),
+                "run_id": str(request.run_id),
+                "value": request.value,
+            }
         )
-    except Exception as e:
+    except FeedbackQueueFullError as e:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Unable to submit feedback. Please try again",
         ) from e
-    logger.info(f"[/feedback] Feedback submitted with ID: '{feedback.id}'.")
-    return FeedbackResponse(feedback_id=feedback.id, **request.model_dump())
+    logger.info("[/feedback] Feedback queued with ID: '%s'.", feedback_id)
+    return FeedbackResponse(feedback_id=feedback_id, **request.model_dump())
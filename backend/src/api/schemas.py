@@ -9,7 +9,47 @@ from src.config import settings
 class HealthCheckResponse(BaseModel):
     """Health check response schema."""
 
-    status: str = Field("ok", description="Service health status.")
+    status: Literal["ok", "starting", "failed"] = Field(
+        "ok",
+        description="Service health status: 'starting' until the research graph "
+        "is built, 'failed' if its build failed.",
+    )
+
+
+class LLMBackendMetrics(BaseModel):
+    """Routing statistics of a single LLM backend."""
+
+    backend: str = Field(..., description="Backend as 'provider:model'.")
+    healthy: bool = Field(..., description="Whether the backend receives traffic.")
+    latency_ms: float | None = Field(None, description="EWMA latency in ms.")
+    error_rate: float = Field(..., description="EWMA error rate.")
+    calls: int = Field(..., description="Number of calls routed to the backend.")
+    failures: int = Field(..., description="Number of failed calls.")
+
+
+class EventLoopLagMetrics(BaseModel):
+    """Event loop lag of the worker, over the recent samples."""
+
+    max_ms: float = Field(..., description="Maximum lag in ms.")
+    p50_ms: float = Field(..., description="Median lag in ms.")
+    p95_ms: float = Field(..., description="95th percentile lag in ms.")
+    p99_ms: float = Field(..., description="99th percentile lag in ms.")
+    samples: int = Field(..., description="Number of lag samples.")
+
+
+class MetricsResponse(BaseModel):
+    """Metrics response schema."""
+
+    llm_routes: dict[str, list[LLMBackendMetrics]] = Field(
+        ...,
+        description="LLM backend statistics per role, in routing order.",
+    )
+    in_flight_runs: int = Field(
+        ..., description="Number of research runs in progress across all workers."
+    )
+    event_loop_lag: EventLoopLagMetrics = Field(
+        ..., description="Event loop lag of the worker serving the request."
+    )
 
 
 class ResearchRequest(BaseModel):
@@ -26,6 +66,37 @@ class ResearchRequest(BaseModel):
         le=settings.APP_MAX_QUERY_COUNT,
         description="Number of search queries to generate.",
     )
+    fast: bool = Field(
+        default=False,
+        description="Summarize findings locally instead of with an LLM.",
+    )
+    stream_queries: bool = Field(
+        default=False,
+        description="Start researching each query while the others are generated.",
+    )
+    trace: bool = Field(
+        default=False,
+        description="Trace the run in full, regardless of trace sampling.",
+    )
+    adaptive: bool = Field(
+        default=False,
+        description="Skip redundant queries and stop searching once results repeat.",
+    )
+    sectioned: bool = Field(
+        default=False,
+        description="Write the report sections concurrently from a planned outline.",
+    )
+
+
+class ReportResponse(BaseModel):
+    """Stored report response schema."""
+
+    run_id: uuid.UUID = Field(..., description="Run ID.")
+    topic: str = Field(..., description="Research topic.")
+    queries: list[str] = Field(..., description="Search queries.")
+    summaries: list[str] = Field(..., description="Research summaries.")
+    report: str = Field(..., description="Final research report.")
+    created_at: str = Field(..., description="Completion time, in ISO 8601.")
 
 
 class FeedbackRequest(BaseModel):
@@ -1,7 +1,79 @@
+import atexit
+import copy
+import json
+import logging
 from logging.config import dictConfig
+from logging.handlers import QueueHandler, QueueListener
+from typing import Literal
 
 
-def configure_logging() -> None:
+class JsonFormatter(logging.Formatter):
+    """Formats log records as compact, single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": f"{record.name}:{record.lineno}",
+            "rid": getattr(record, "correlation_id", None),
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, separators=(",", ":"), default=str)
+
+
+# The listener of the "queue" handler, while production logging is configured.
+_listener: QueueListener | None = None
+
+
+class LazyQueueHandler(QueueHandler):
+    """Queue handler that leaves formatting of records to the listener thread.
+
+    The default `QueueHandler` fully formats records before queueing them, so
+    they can be pickled. The queue never leaves the process here, so records
+    are queued with only their message interpolated, which freezes arguments
+    that may change before the listener gets to them. Formatting the record,
+    including its traceback, is left to the listener. Filters, such as the
+    correlation ID filter, still run on the calling thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # A copy, as other handlers of the record may still format it.
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+
+def _stop_listener() -> None:
+    """Stops the listener, once it has written the queued records."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(_stop_listener)
+
+
+def configure_logging(
+    mode: Literal["development", "production"] = "development",
+) -> None:
+    """Configures logging for the `src` and `uvicorn` loggers. Configuring it
+    again stops the background thread of the previous configuration.
+
+    Args:
+        mode (Literal["development", "production"]): "development" writes rich
+            console logs synchronously. "production" queues records and writes
+            them as JSON from a background thread, off the event loop.
+    """
+    global _listener
+    # Flushes the queue before its handlers are replaced
+    _stop_listener()
+
+    handler = "queue" if mode == "production" else "default"
     dictConfig(
         {
             "version": 1,
@@ -19,6 +91,10 @@ def configure_logging() -> None:
                     "datefmt": "%Y-%m-%dT%H:%M:%S",
                     "format": "[rid: %(correlation_id)s] [%(name)s:%(lineno)d] - %(message)s",  # noqa: E501
                 },
+                "json": {
+                    "()": JsonFormatter,
+                    "datefmt": "%Y-%m-%dT%H:%M:%S%z",
+                },
             },
             "handlers": {
                 "default": {
@@ -27,17 +103,34 @@ def configure_logging() -> None:
                     "formatter": "console",
                     "filters": ["correlation_id"],
                 },
+                "json": {
+                    "class": "logging.StreamHandler",
+                    "level": "INFO",
+                    "formatter": "json",
+                },
+                "queue": {
+                    "class": "src.config.logging_config.LazyQueueHandler",
+                    "level": "INFO",
+                    "filters": ["correlation_id"],
+                    "handlers": ["json"],
+                    "respect_handler_level": True,
+                },
             },
             "loggers": {
                 "uvicorn": {
-                    "handlers": ["default"],
+                    "handlers": [handler],
                     "level": "INFO",
                 },
                 "src": {
-                    "handlers": ["default"],
+                    "handlers": [handler],
                     "level": "INFO",
                     "propagate": False,
                 },
             },
         }
     )
+
+    if mode == "production":
+        # The listener writes queued records from a background thread until exit.
+        _listener = logging.getHandlerByName("queue").listener
+        _listener.start()
@@ -23,6 +23,66 @@ class Settings(BaseSettings):
     APP_RATE_LIMIT_DELTA: int = 60
     APP_RATE_LIMIT: int = 5
     APP_RATE_LIMIT_PATHS: str = "/research"
+    # "production" logs compact JSON, written by a background thread.
+    APP_LOG_MODE: Literal["development", "production"] = "development"
+    # Completed runs cached for near-duplicate topics, 0 disables the cache.
+    APP_TOPIC_CACHE_SIZE: int = 10_000
+    # Most recent runs completed by other workers kept in each worker's topic
+    # cache, on top of its own runs. Older shared runs are skipped.
+    APP_TOPIC_CACHE_SHARED_SIZE: int = 1_000
+    # Topic similarity at which a cached run is served as is.
+    APP_TOPIC_CACHE_SERVE_THRESHOLD: float = 0.95
+    # Topic similarity at which a new run reuses the cached queries.
+    APP_TOPIC_CACHE_SEED_THRESHOLD: float = 0.8
+    # Adaptive research: query similarity at which a generated query is dropped,
+    # the fraction of novel search content below which searching stops, and the
+    # number of queries always searched.
+    APP_ADAPTIVE_QUERY_SIMILARITY: float = 0.8
+    APP_ADAPTIVE_NOVELTY_THRESHOLD: float = 0.3
+    APP_ADAPTIVE_MIN_SEARCHES: int = 2
+    # Upstream calls of completed runs are recorded in this directory, for offline
+    # replay with `python -m benchmarks.replay`. Empty disables recording.
+    APP_CASSETTE_DIR: str = ""
+
+    # Topic safety checks arriving within this many seconds are checked with one
+    # LLM call, up to the batch size. A batch size of 1 disables batching.
+    APP_SAFETY_BATCH_WINDOW: float = 0.005
+    APP_SAFETY_BATCH_SIZE: int = 8
+
+    # *** Event loop settings ***
+    # Seconds between event loop lag samples, and the number of samples kept.
+    APP_LOOP_LAG_INTERVAL: float = 0.05
+    APP_LOOP_LAG_WINDOW: int = 1_200
+    # Seconds the event loop may be blocked before the blocking stack is logged.
+    APP_LOOP_SLOW_THRESHOLD: float = 0.1
+    # Prompts built from at least this many characters of search docs or memos
+    # are assembled in a thread, off the event loop. Below it, assembly costs
+    # about as much as the thread hand-off (~0.1ms), rising to ~4ms at 4M chars,
+    # see `python -m benchmarks.offload`. Typical prompts are under 20K chars.
+    APP_PROMPT_OFFLOAD_CHARS: int = 1_000_000
+
+    # *** Feedback settings ***
+    APP_FEEDBACK_QUEUE_SIZE: int = 10_000
+    # Feedback is flushed once a batch is full or the interval (seconds) passes.
+    APP_FEEDBACK_BATCH_SIZE: int = 50
+    APP_FEEDBACK_FLUSH_INTERVAL: float = 2.0
+    APP_FEEDBACK_MAX_ATTEMPTS: int = 5
+    # Queued feedback is kept in this file across restarts.
+    APP_FEEDBACK_SPOOL_PATH: str = "feedback.spool.jsonl"
+
+    # *** Shared state settings ***
+    # Rate limits, in-flight runs and completed runs are shared by the workers of
+    # a host in this SQLite database.
+    APP_SHARED_STATE_PATH: str = "shared_state.db"
+    # Seconds without a heartbeat after which a worker is presumed dead, and its
+    # in-flight runs are dropped. Workers renew their lease every third of it.
+    APP_SHARED_STATE_LEASE: float = 30.0
+
+    # *** Report store settings ***
+    # Completed runs are stored compressed in this directory, served by run ID.
+    APP_REPORT_STORE_PATH: str = "reports"
+    # Seconds clients may reuse a fetched report before revalidating it.
+    APP_REPORT_MAX_AGE: int = 86_400
 
     # *** LLM settings ***
     # Groq
@@ -35,18 +95,49 @@ class Settings(BaseSettings):
     GOOGLE_FLASH: str = "gemini-1.5-flash"
     GOOGLE_FLASH_TEMPERATURE: float = 0.2
 
+    # *** LLM routing settings ***
+    # Comma-separated "provider:model" backends routed alongside each role's
+    # primary model. Leave empty to pin a role to its primary model.
+    LLM_TOOL_FALLBACKS: str = "google:gemini-1.5-flash"
+    LLM_REPORT_FALLBACKS: str = "google:gemini-1.5-flash"
+    LLM_SUMMARY_FALLBACKS: str = "groq:llama-3.1-70b-versatile"
+    # Seconds until a call (or its first streamed chunk) fails over.
+    LLM_ROUTER_TIMEOUT: float = 30.0
+    LLM_ROUTER_EWMA_ALPHA: float = 0.3
+    # Backends at or above this EWMA error rate are skipped until the cooldown.
+    LLM_ROUTER_ERROR_THRESHOLD: float = 0.5
+    LLM_ROUTER_COOLDOWN: float = 30.0
+    # Share of calls sent first to a random other healthy backend, to re-measure
+    # backends whose latency sample is stale.
+    LLM_ROUTER_EXPLORE_RATE: float = 0.05
+    # USD per million input and output tokens by model, for run cost estimates.
+    LLM_TOKEN_PRICES: dict[str, tuple[float, float]] = {
+        "llama-3.1-70b-versatile": (0.59, 0.79),
+        "gemini-1.5-flash": (0.075, 0.3),
+    }
+
     # *** Tools settings ***
-    # Tavily
-    TAVILY_API_KEY: str
+    # Search backend: "tavily" searches the web, "local" searches a local corpus.
+    SEARCH_BACKEND: Literal["tavily", "local"] = "tavily"
+
+    # Tavily, only required by the "tavily" search backend
+    TAVILY_API_KEY: str = ""
     TAVILY_SEARCH_DEPTH: Literal["basic", "advanced"] = "basic"
     TAVILY_EXCLUDE_DOMAINS: list[str] = ["youtube.com"]
 
+    # Local BM25 index, built with `python -m src.search.index CORPUS_DIR`
+    LOCAL_SEARCH_INDEX_PATH: str = "search_index"
+    LOCAL_SEARCH_MAX_RESULTS: int = 5
+
     # *** LangSmith settings ***
     LANGCHAIN_API_KEY: str
     LANGCHAIN_ENDPOINT: str
     LANGCHAIN_PROJECT: str
     LANGCHAIN_TRACING_V2: Literal["true", "false"]
     LANGCHAIN_FEEDBACK_KEY: str = "research-feedback"
+    # Fraction of runs traced in full, flagged runs are always traced. Other runs
+    # are recorded as a single root run, so feedback and errors still show up.
+    LANGCHAIN_TRACING_SAMPLE_RATE: float = 1.0
 
     @property
     def allowed_origins(self) -> list[str]:
@@ -66,6 +157,43 @@ class Settings(BaseSettings):
         """
         return [path.strip() for path in self.APP_RATE_LIMIT_PATHS.split(",")]
 
+    @staticmethod
+    def _parse_llm_backends(value: str) -> list[tuple[str, str]]:
+        """Parses comma-separated "provider:model" pairs."""
+        backends = []
+        for backend in value.split(","):
+            if backend := backend.strip():
+                provider, _, model = backend.partition(":")
+                backends.append((provider.strip(), model.strip()))
+        return backends
+
+    @property
+    def llm_tool_fallbacks(self) -> list[tuple[str, str]]:
+        """Returns the fallback backends for tool calling.
+
+        Returns:
+            list[tuple[str, str]]: A list of `(provider, model)` pairs.
+        """
+        return self._parse_llm_backends(self.LLM_TOOL_FALLBACKS)
+
+    @property
+    def llm_report_fallbacks(self) -> list[tuple[str, str]]:
+        """Returns the fallback backends for report writing.
+
+        Returns:
+            list[tuple[str, str]]: A list of `(provider, model)` pairs.
+        """
+        return self._parse_llm_backends(self.LLM_REPORT_FALLBACKS)
+
+    @property
+    def llm_summary_fallbacks(self) -> list[tuple[str, str]]:
+        """Returns the fallback backends for research summaries.
+
+        Returns:
+            list[tuple[str, str]]: A list of `(provider, model)` pairs.
+        """
+        return self._parse_llm_backends(self.LLM_SUMMARY_FALLBACKS)
+
 
 def get_settings() -> Settings:
     """
@@ -0,0 +1,169 @@
+import asyncio
+import re
+from typing import Any
+
+import numpy as np
+from langchain_core.runnables.config import ensure_config
+
+from src.graph.cache import embed_topic
+
+# The run config key under which a run's `AdaptiveResearch` is passed to nodes.
+ADAPTIVE_RESEARCH_KEY = "adaptive_research"
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+_TAG_PATTERN = re.compile(r"<[^>]*>")
+
+
+def _similarity(
+    a: tuple[np.ndarray, np.ndarray], b: tuple[np.ndarray, np.ndarray]
+) -> float:
+    """Returns the cosine similarity of two sparse query embeddings."""
+    _, a_idx, b_idx = np.intersect1d(
+        a[0], b[0], assume_unique=True, return_indices=True
+    )
+    return float(a[1][a_idx] @ b[1][b_idx])
+
+
+def _shingles(search_docs: list[str], size: int) -> set[int]:
+    """Returns the hashed word n-grams of the search docs' content."""
+    shingles: set[int] = set()
+    for doc in search_docs:
+        tokens = _TOKEN_PATTERN.findall(_TAG_PATTERN.sub(" ", doc).lower())
+        shingles.update(
+            hash(tuple(tokens[i : i + size]))
+            for i in range(max(len(tokens) - size + 1, 1))
+        )
+    return shingles
+
+
+class AdaptiveResearch:
+    """Run-scoped state of an adaptive research run.
+
+    Generated queries that are near-duplicates of an earlier query are dropped
+    before they are researched. The first `min_searches` queries are searched
+    right away; every later search waits until the results of all earlier ones
+    are in, and is only launched while the previous search added enough novel
+    content. A search whose results are mostly already collected is not
+    summarized, and stops all later searches.
+    """
+
+    def __init__(
+        self,
+        query_similarity: float,
+        novelty_threshold: float,
+        min_searches: int,
+        shingle_size: int = 5,
+    ):
+        """Initializes the adaptive research state.
+
+        Args:
+            query_similarity (float): Similarity at which a query is a duplicate.
+            novelty_threshold (float): Minimum fraction of novel content for
+                search results to be summarized.
+            min_searches (int): Number of queries searched without waiting.
+            shingle_size (int): Word n-gram size for comparing search results.
+        """
+        self._query_similarity = query_similarity
+        self._novelty_threshold = novelty_threshold
+        self._min_searches = min_searches
+        self._shingle_size = shingle_size
+
+        self._queries: dict[str, int] = {}  # Admitted queries and their ranks
+        self._embeddings: list[tuple[np.ndarray, np.ndarray]] = []
+        self._shingles: set[int] = set()
+        self._searched = 0
+        self._searched_changed = asyncio.Condition()
+        self._stopped = False
+
+        self.collapsed_queries: list[str] = []
+        self.saved_searches = 0
+        self.saved_summaries = 0
+
+    @staticmethod
+    def from_config() -> "AdaptiveResearch | None":
+        """Returns the adaptive research state of the current run, if any."""
+        return ensure_config().get("configurable", {}).get(ADAPTIVE_RESEARCH_KEY)
+
+    def admit_query(self, query: str) -> bool:
+        """Admits a query for research, unless it duplicates an admitted query.
+
+        Args:
+            query (str): The generated query.
+
+        Returns:
+            bool: True if the query should be researched.
+        """
+        embedding = embed_topic(query)
+        if query in self._queries or any(
+            _similarity(embedding, admitted) >= self._query_similarity
+            for admitted in self._embeddings
+        ):
+            self.collapsed_queries.append(query)
+            self.saved_searches += 1
+            self.saved_summaries += 1
+            return False
+
+        self._queries[query] = len(self._queries)
+        self._embeddings.append(embedding)
+        return True
+
+    async def start_search(self, query: str) -> bool:
+        """Waits for the turn of the query's search.
+
+        Args:
+            query (str): The admitted query.
+
+        Returns:
+            bool: True if the search should be launched.
+        """
+        rank = self._queries.get(query, 0)
+        if rank >= self._min_searches:
+            async with self._searched_changed:
+                await self._searched_changed.wait_for(lambda: self._searched >= rank)
+
+        if self._stopped:
+            self.saved_searches += 1
+            self.saved_summaries += 1
+            await self._finish()
+            return False
+        return True
+
+    async def finish_search(self, search_docs: list[str]) -> bool:
+        """Records the results of a launched search, letting the next one start.
+
+        Args:
+            search_docs (list[str]): The search results.
+
+        Returns:
+            bool: True if the results are novel enough to be summarized.
+        """
+        shingles = _shingles(search_docs, self._shingle_size)
+        novel = bool(shingles) and (
+            len(shingles - self._shingles) / len(shingles) >= self._novelty_threshold
+        )
+        self._shingles |= shingles
+
+        if not novel:
+            self.saved_summaries += 1
+            # Searches without results say nothing about the remaining queries
+            self._stopped = self._stopped or bool(shingles)
+        await self._finish()
+        return novel
+
+    async def _finish(self) -> None:
+        async with self._searched_changed:
+            self._searched += 1
+            self._searched_changed.notify_all()
+
+    def report(self) -> dict[str, Any]:
+        """Returns the savings of the run.
+
+        Returns:
+            dict[str, Any]: The collapsed queries, and the number of searches and
+                summaries saved.
+        """
+        return {
+            "collapsed_queries": self.collapsed_queries,
+            "saved_searches": self.saved_searches,
+            "saved_summaries": self.saved_summaries,
+        }
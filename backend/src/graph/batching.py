@@ -0,0 +1,95 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher[T, R]:
+    """Collects items submitted by concurrent callers into batches, processed
+    with a single call.
+
+    A batch is processed once `max_size` items are pending, or `window` seconds
+    after its first item arrived, whichever comes first, so a caller waits at
+    most `window` seconds longer than the call itself. The batch is processed
+    in the context of the caller that completed it (the one that opened it,
+    when the window elapses), so its callbacks, such as usage and tracing, are
+    attributed to that caller's run.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[[list[T]], Awaitable[list[R | BaseException]]],
+        *,
+        window: float = 0.005,
+        max_size: int = 8,
+    ):
+        """Initializes the batcher.
+
+        Args:
+            fn (Callable[[list[T]], Awaitable[list[R | BaseException]]]):
+                Processes a batch, returning one result per item, in order. An
+                exception in place of a result fails that item only.
+            window (float): The maximum seconds a batch waits for more items.
+            max_size (int): The maximum number of items per batch.
+        """
+        self._fn = fn
+        self._window = window
+        self._max_size = max_size
+
+        self._pending: list[tuple[T, asyncio.Future[R]]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, item: T) -> R:
+        """Adds an item to the next batch and waits for its result.
+
+        Args:
+            item (T): The item to process.
+
+        Returns:
+            R: The result of the item.
+
+        Raises:
+            Exception: The error of the item, or of the batch call, if it failed.
+        """
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[R] = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self._max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        # Keeps a reference, as the loop only keeps weak references to tasks
+        task = asyncio.create_task(self._process(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _process(self, batch: list[tuple[T, asyncio.Future[R]]]) -> None:
+        logger.debug("[MicroBatcher] Processing a batch of %d items.", len(batch))
+        try:
+            results = await self._fn([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(
+                    f"Expected {len(batch)} batch results, got {len(results)}."
+                )
+        except Exception as e:
+            for _, future in batch:
+                # Callers that were cancelled no longer wait for a result
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results, strict=True):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
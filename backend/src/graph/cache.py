@@ -0,0 +1,271 @@
+import re
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+
+import numpy as np
+
+# Filler words that do not change what a topic is about.
+_STOPWORDS = frozenset(
+    {
+        "a",
+        "about",
+        "an",
+        "and",
+        "between",
+        "compare",
+        "compared",
+        "comparison",
+        "difference",
+        "differences",
+        "for",
+        "how",
+        "in",
+        "is",
+        "of",
+        "on",
+        "or",
+        "the",
+        "to",
+        "versus",
+        "vs",
+        "what",
+        "with",
+    }
+)
+# Stopwords linking two words as compared, so their order does not matter.
+_SYMMETRIC_LINKS = frozenset(
+    {
+        "and",
+        "between",
+        "compare",
+        "compared",
+        "comparison",
+        "difference",
+        "differences",
+        "or",
+        "versus",
+        "vs",
+    }
+)
+# Stopwords that do not change how two words relate.
+_NEUTRAL_LINKS = frozenset({"a", "an", "how", "is", "the", "what"})
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+# Weight of a word relation, as much as the word itself: swapping two words of
+# "impact of ai on jobs" scores about 0.82, well below the serve threshold.
+_PAIR_WEIGHT = 2
+
+
+def _word_pairs(words: list[str]) -> list[str]:
+    """Returns the relations of consecutive non-stopwords, skipping stopwords.
+
+    Words linked by a comparison, such as "rust vs go", yield an unordered
+    pair. Others yield the ordered pair with the stopwords linking them, so
+    "impact of jobs on ai" and "impact of ai on jobs", or "rust for go" and
+    "go to rust", differ.
+    """
+    pairs = []
+    previous, link = None, []
+    for word in words:
+        if word in _STOPWORDS:
+            link.append(word)
+            continue
+        if previous is not None:
+            if _SYMMETRIC_LINKS.intersection(link):
+                pairs.append("~".join(sorted((previous, word))))
+            else:
+                relation = " ".join(w for w in link if w not in _NEUTRAL_LINKS)
+                pairs.append(f"{previous}>{relation}>{word}")
+        previous, link = word, []
+    return pairs
+
+
+def embed_topic(
+    topic: str, *, dim: int = 1 << 18, max_features: int = 64
+) -> tuple[np.ndarray, np.ndarray]:
+    """Embeds a topic as a sparse, L2-normalized vector of hashed n-grams.
+
+    Words, their character trigrams, and the relations of consecutive words
+    (see `_word_pairs`) are hashed into `dim` buckets. Trigrams make the
+    embedding robust to small spelling changes, and word relations make it
+    depend on word order where order changes the meaning. Only the
+    `max_features` heaviest buckets are kept.
+
+    Args:
+        topic (str): The topic to embed.
+        dim (int): The number of hash buckets, a power of two.
+        max_features (int): The maximum number of non-zero buckets.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The bucket indexes (int32) and their
+            weights (float32), sorted by descending weight.
+    """
+    words = _TOKEN_PATTERN.findall(topic.lower())
+    counts: Counter[int] = Counter()
+    for token in words:
+        if token in _STOPWORDS:
+            continue
+        counts[zlib.crc32(token.encode()) & (dim - 1)] += 2
+        padded = f"#{token}#"
+        for i in range(len(padded) - 2):
+            counts[zlib.crc32(padded[i : i + 3].encode()) & (dim - 1)] += 1
+    for pair in _word_pairs(words):
+        counts[zlib.crc32(pair.encode()) & (dim - 1)] += _PAIR_WEIGHT
+
+    # Ties are broken by bucket, so truncation does not depend on word order.
+    top = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:max_features]
+    features = np.fromiter((f for f, _ in top), dtype=np.int32, count=len(top))
+    weights = np.sqrt(
+        np.fromiter((c for _, c in top), dtype=np.float32, count=len(top))
+    )
+    if norm := float(np.linalg.norm(weights)):
+        weights /= norm
+    return features, weights
+
+
+@dataclass
+class CachedResearch:
+    """A completed research run, as served from the topic cache."""
+
+    topic: str
+    query_count: int
+    queries: list[str]
+    report: str
+    run_id: str
+    fast: bool = False  # Whether the report was written from extractive summaries
+
+
+class TopicCache:
+    """Bounded cache of completed research runs, looked up by topic similarity.
+
+    Topic embeddings live in fixed-size NumPy arrays, one padded row per slot.
+    A lookup probes the postings of the query's rarest buckets for candidate
+    slots, then scores all candidates at once with a vectorized sparse cosine.
+    Once full, the oldest entry is evicted.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        *,
+        dim: int = 1 << 18,
+        max_features: int = 64,
+        probe_features: int = 4,
+    ):
+        """Initializes an empty cache.
+
+        Args:
+            capacity (int): The maximum number of cached runs.
+            dim (int): The number of hash buckets of the topic embeddings.
+            max_features (int): The maximum number of non-zero buckets per topic.
+            probe_features (int): The number of rarest query buckets whose
+                postings are probed for candidates.
+        """
+        self._capacity = capacity
+        self._dim = dim
+        self._max_features = max_features
+        self._probe_features = probe_features
+
+        self._features = np.zeros((capacity, max_features), dtype=np.int32)
+        self._weights = np.zeros((capacity, max_features), dtype=np.float32)
+        self._entries: list[CachedResearch | None] = [None] * capacity
+        self._postings: dict[int, set[int]] = {}
+        self._next = 0  # Next slot to write, the oldest one once full
+        self._query = np.zeros(dim, dtype=np.float32)  # Scratch query vector
+
+    def __len__(self) -> int:
+        return sum(entry is not None for entry in self._entries)
+
+    def embed(self, topic: str) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the embedding of a topic, see `embed_topic`. Reads no cache
+        state, so it may run in another thread while the cache is in use.
+
+        Args:
+            topic (str): The research topic.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The topic embedding.
+        """
+        return embed_topic(topic, dim=self._dim, max_features=self._max_features)
+
+    def _search(
+        self, features: np.ndarray, weights: np.ndarray
+    ) -> tuple[int, float] | None:
+        """Returns the most similar slot and its cosine similarity, if any."""
+        postings = sorted(
+            (self._postings[f] for f in features.tolist() if f in self._postings),
+            key=len,
+        )[: self._probe_features]
+        if not postings:
+            return None
+        candidates = np.fromiter(set().union(*postings), dtype=np.intp)
+
+        self._query[features] = weights
+        scores = (
+            self._query[self._features[candidates]] * self._weights[candidates]
+        ).sum(axis=1)
+        self._query[features] = 0.0
+
+        best = int(np.argmax(scores))
+        return int(candidates[best]), float(scores[best])
+
+    def lookup(self, topic: str) -> tuple[CachedResearch, float] | None:
+        """Finds the cached run with the topic most similar to the given one.
+
+        Args:
+            topic (str): The research topic.
+
+        Returns:
+            tuple[CachedResearch, float] | None: The cached run and its cosine
+                similarity to the topic, or None if no cached topic shares
+                any feature with it.
+        """
+        if (match := self._search(*self.embed(topic))) is None:
+            return None
+        slot, similarity = match
+        return self._entries[slot], similarity
+
+    def add(
+        self,
+        research: CachedResearch,
+        *,
+        replace_above: float | None = None,
+        embedding: tuple[np.ndarray, np.ndarray] | None = None,
+    ) -> None:
+        """Adds a completed run, evicting the oldest one if the cache is full.
+
+        Args:
+            research (CachedResearch): The completed research run.
+            replace_above (float | None): Overwrite the most similar cached run
+                instead if its similarity is at least this value.
+            embedding (tuple[np.ndarray, np.ndarray] | None): The embedding of
+                the run's topic from `embed`, computed here if not given.
+        """
+        features, weights = embedding or self.embed(research.topic)
+        match = None if replace_above is None else self._search(features, weights)
+        if match and match[1] >= replace_above:
+            slot = match[0]
+        else:
+            slot = self._next
+            self._next = (self._next + 1) % self._capacity
+
+        self._evict(slot)
+        self._features[slot, : len(features)] = features
+        self._weights[slot, : len(weights)] = weights
+        self._entries[slot] = research
+        for feature in features.tolist():
+            self._postings.setdefault(feature, set()).add(slot)
+
+    def _evict(self, slot: int) -> None:
+        if self._entries[slot] is None:
+            return
+        for feature, weight in zip(
+            self._features[slot].tolist(), self._weights[slot].tolist(), strict=True
+        ):
+            if weight and (posting := self._postings.get(feature)) is not None:
+                posting.discard(slot)
+                if not posting:
+                    del self._postings[feature]
+        self._features[slot] = 0
+        self._weights[slot] = 0.0
+        self._entries[slot] = None
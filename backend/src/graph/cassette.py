@@ -0,0 +1,368 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections.abc import AsyncIterator, Callable
+from pathlib import Path
+from typing import Any
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel, LangSmithParams
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable
+from langchain_core.runnables.config import ensure_config
+
+from src.search import SearchBackend, SearchResult
+
+logger = logging.getLogger(__name__)
+
+# The run config key under which a run's `Cassette` is passed to the wrappers.
+CASSETTE_KEY = "cassette"
+
+CASSETTE_VERSION = 1
+
+
+class CassetteError(Exception):
+    """Raised when a replayed run makes a call the cassette has no answer for,
+    or when a replayed call failed when it was recorded."""
+
+    pass
+
+
+class Cassette:
+    """Upstream calls of a research run: LLM calls, with their streamed chunks,
+    and searches, with the time each chunk or result took to arrive.
+
+    A recording cassette collects the calls of a run, to be saved as JSON
+    lines: a header with the run's `astream` arguments, then one call per line.
+    A replaying cassette answers each call with a recorded one, sleeping the
+    recorded delays times `time_scale`. Calls are matched by a hash of their
+    request. A request that was not recorded, such as a changed prompt, is
+    answered with the earliest unused call of the same kind and role, so runs
+    can be replayed across code versions.
+    """
+
+    def __init__(
+        self,
+        run: dict[str, Any],
+        calls: list[dict[str, Any]] | None = None,
+        time_scale: float = 1.0,
+    ):
+        """Initializes the cassette.
+
+        Args:
+            run (dict[str, Any]): The `astream` arguments of the run.
+            calls (list[dict[str, Any]] | None): The recorded calls to replay,
+                or None to record.
+            time_scale (float): The factor applied to recorded delays on replay,
+                0 to replay without delays.
+        """
+        self.run = run
+        self.replaying = calls is not None
+        self.time_scale = time_scale
+        self._calls: list[dict[str, Any]] = calls or []
+        self._used = [False] * len(self._calls)
+        self.misses = 0  # Replayed calls matched by kind and role only
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    @staticmethod
+    def from_config() -> "Cassette | None":
+        """Returns the cassette of the current run, if any."""
+        return ensure_config().get("configurable", {}).get(CASSETTE_KEY)
+
+    @classmethod
+    def load(cls, path: Path, time_scale: float = 1.0) -> "Cassette":
+        """Loads a recorded cassette for replay.
+
+        Args:
+            path (Path): The cassette file.
+            time_scale (float): The factor applied to recorded delays.
+
+        Returns:
+            Cassette: The replaying cassette.
+
+        Raises:
+            CassetteError: If the file is not a cassette of a supported version.
+        """
+        with path.open() as file:
+            header = json.loads(file.readline())
+            if header.get("version") != CASSETTE_VERSION:
+                raise CassetteError(f"Unsupported cassette: {path}")
+            calls = [json.loads(line) for line in file if line.strip()]
+        return cls(run=header["run"], calls=calls, time_scale=time_scale)
+
+    def save(self, path: Path) -> None:
+        """Saves the recorded calls.
+
+        Args:
+            path (Path): The cassette file, replaced if it exists.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with tmp_path.open("w") as file:
+            file.write(json.dumps({"version": CASSETTE_VERSION, "run": self.run}))
+            file.write("\n")
+            file.writelines(json.dumps(call) + "\n" for call in self._calls)
+        tmp_path.replace(path)
+
+    def record(self, call: dict[str, Any]) -> None:
+        """Records a completed call.
+
+        Args:
+            call (dict[str, Any]): The call's `kind`, `role`, request `key`,
+                and response.
+        """
+        self._calls.append(call)
+
+    def take(self, kind: str, role: str, key: str) -> dict[str, Any]:
+        """Returns the recorded call answering a request.
+
+        Args:
+            kind (str): The kind of call, "llm" or "search".
+            role (str): The role of the called model or backend.
+            key (str): The hash of the request.
+
+        Returns:
+            dict[str, Any]: The recorded call.
+
+        Raises:
+            CassetteError: If no unused call of the kind and role is left.
+        """
+        fallback = None
+        for idx, call in enumerate(self._calls):
+            if self._used[idx] or (call["kind"], call["role"]) != (kind, role):
+                continue
+            if call["key"] == key:
+                fallback = idx
+                break
+            fallback = idx if fallback is None else fallback
+        if fallback is None:
+            raise CassetteError(f"No recorded {kind} call left for '{role}'.")
+
+        if self._calls[fallback]["key"] != key:
+            self.misses += 1
+            logger.warning(
+                "[Cassette] Request of '%s' was not recorded, replaying the next "
+                "recorded call.",
+                role,
+            )
+        self._used[fallback] = True
+        return self._calls[fallback]
+
+    def pacer(self) -> "_Pacer":
+        """Returns a pacer for the recorded delays of a replayed call."""
+        return _Pacer(self.time_scale)
+
+
+class _Pacer:
+    """Waits out the recorded delays of a call, scaled, against the call's start
+    rather than sleeping each delay, so timer overshoot does not accumulate over
+    many small delays such as those between streamed chunks."""
+
+    def __init__(self, time_scale: float):
+        self._time_scale = time_scale
+        self._due = time.perf_counter()
+
+    async def wait(self, delay: float) -> None:
+        if self._time_scale <= 0:
+            return
+        self._due += delay * self._time_scale
+        if (remaining := self._due - time.perf_counter()) > 0:
+            await asyncio.sleep(remaining)
+
+
+def _request_key(payload: Any) -> str:
+    data = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()[:32]
+
+
+class CassetteChatModel(BaseChatModel):
+    """Chat model that records or replays the calls of the wrapped model, when
+    the current run has a cassette, and passes them through otherwise."""
+
+    llm: BaseChatModel
+    role: str
+
+    @property
+    def _llm_type(self) -> str:
+        return self.llm._llm_type
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return self.llm._identifying_params
+
+    def _get_ls_params(
+        self, stop: list[str] | None = None, **kwargs: Any
+    ) -> LangSmithParams:
+        return self.llm._get_ls_params(stop=stop, **kwargs)
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> Runnable:
+        """Binds the tools to the wrapped model, in its own tool format."""
+        return self.bind(**self.llm.bind_tools(tools, **kwargs).kwargs)
+
+    def _key(
+        self, messages: list[BaseMessage], stop: list[str] | None, **kwargs: Any
+    ) -> str:
+        return _request_key(
+            {
+                "messages": [(message.type, message.content) for message in messages],
+                "stop": stop,
+                "kwargs": kwargs,
+            }
+        )
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        # Only async calls are recorded, as the graph only makes async calls.
+        return self.llm._generate(messages, stop=stop, **kwargs)
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if (cassette := Cassette.from_config()) is None:
+            return await self.llm._agenerate(messages, stop=stop, **kwargs)
+
+        key = self._key(messages, stop, **kwargs)
+        if cassette.replaying:
+            call = cassette.take("llm", self.role, key)
+            await cassette.pacer().wait(call["delays"][0])
+            if "error" in call:
+                raise CassetteError(call["error"])
+            return ChatResult(
+                generations=[
+                    ChatGeneration(message=AIMessage(**message))
+                    for message in call["messages"]
+                ]
+            )
+
+        start = time.perf_counter()
+        call = {"kind": "llm", "role": self.role, "key": key}
+        try:
+            result = await self.llm._agenerate(messages, stop=stop, **kwargs)
+        except Exception as e:
+            cassette.record(
+                {**call, "delays": [time.perf_counter() - start], "error": repr(e)}
+            )
+            raise
+        cassette.record(
+            {
+                **call,
+                "delays": [time.perf_counter() - start],
+                "messages": [
+                    generation.message.model_dump(exclude_defaults=True)
+                    for generation in result.generations
+                ],
+            }
+        )
+        return result
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        if (cassette := Cassette.from_config()) is None:
+            async for chunk in self.llm._astream(messages, stop=stop, **kwargs):
+                yield chunk
+            return
+
+        key = self._key(messages, stop, **kwargs)
+        if cassette.replaying:
+            call = cassette.take("llm", self.role, key)
+            pacer = cassette.pacer()
+            for delay, chunk in zip(call["delays"], call["chunks"], strict=False):
+                await pacer.wait(delay)
+                yield ChatGenerationChunk(message=AIMessageChunk(**chunk))
+            if "error" in call:
+                await pacer.wait(call["delays"][-1])
+                raise CassetteError(call["error"])
+            return
+
+        call = {
+            "kind": "llm",
+            "role": self.role,
+            "key": key,
+            "delays": [],
+            "chunks": [],
+        }
+        last = time.perf_counter()
+        try:
+            async for chunk in self.llm._astream(messages, stop=stop, **kwargs):
+                now = time.perf_counter()
+                call["delays"].append(now - last)
+                call["chunks"].append(chunk.message.model_dump(exclude_defaults=True))
+                last = now
+                yield chunk
+        except Exception as e:
+            call["delays"].append(time.perf_counter() - last)
+            call["error"] = repr(e)
+            raise
+        finally:
+            cassette.record(call)
+
+
+class CassetteSearchBackend(SearchBackend):
+    """Search backend that records or replays the searches of the wrapped
+    backend, when the current run has a cassette, and passes them through
+    otherwise."""
+
+    def __init__(self, search: Callable[[], SearchBackend], role: str):
+        """Initializes the wrapper.
+
+        Args:
+            search (Callable[[], SearchBackend]): Returns the wrapped backend,
+                called on the first search that is not replayed.
+            role (str): The name of the backend in cassettes.
+        """
+        self._factory = search
+        self._search: SearchBackend | None = None
+        self._role = role
+
+    async def _asearch(self, query: str) -> list[SearchResult]:
+        if self._search is None:
+            self._search = self._factory()
+        return await self._search.asearch(query)
+
+    async def asearch(self, query: str) -> list[SearchResult]:
+        if (cassette := Cassette.from_config()) is None:
+            return await self._asearch(query)
+
+        key = _request_key({"query": query})
+        if cassette.replaying:
+            call = cassette.take("search", self._role, key)
+            await cassette.pacer().wait(call["delays"][0])
+            if "error" in call:
+                raise CassetteError(call["error"])
+            return call["results"]
+
+        start = time.perf_counter()
+        call: dict[str, Any] = {"kind": "search", "role": self._role, "key": key}
+        try:
+            results = await self._asearch(query)
+        except Exception as e:
+            cassette.record(
+                {**call, "delays": [time.perf_counter() - start], "error": repr(e)}
+            )
+            raise
+        cassette.record(
+            {**call, "delays": [time.perf_counter() - start], "results": results}
+        )
+        return results
@@ -4,3 +4,12 @@ NODE_SEARCH_WEB: str = "search_web"
 NODE_GENERATE_RESEARCH_SUMMARY: str = "generate_research_summary"
 NODE_WRITE_REPORT: str = "write_report"
 NODE_SAFETY_CHECK: str = "safety_check"
+
+# Custom event streaming report text in document order, and the tag of the model
+# runs whose out-of-order chunks it replaces.
+EVENT_REPORT_CHUNK: str = "report_chunk"
+TAG_REPORT_SECTION: str = "report_section"
+
+# Custom event reporting LLM token usage made outside of the run's own callbacks,
+# such as its share of a batched call.
+EVENT_LLM_USAGE: str = "llm_usage"
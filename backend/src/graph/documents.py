@@ -0,0 +1,53 @@
+from langchain_core.runnables.config import ensure_config
+
+# The run config key under which a run's `DocumentStore` is passed to nodes.
+DOCUMENT_STORE_KEY = "document_store"
+
+
+class DocumentStore:
+    """Run-scoped store of the search docs and research summaries of a run.
+
+    LangGraph copies the graph state at every step, and `astream_events` puts
+    it into the start and end events of every chain. Large texts are therefore
+    kept here, and the state only carries their references, which the nodes
+    that need the text resolve. The store is dropped with the run's config.
+    """
+
+    def __init__(self):
+        self._texts: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    @staticmethod
+    def from_config() -> "DocumentStore":
+        """Returns the document store of the current run.
+
+        Raises:
+            KeyError: If the run has no document store.
+        """
+        return ensure_config()["configurable"][DOCUMENT_STORE_KEY]
+
+    def put(self, texts: list[str]) -> list[str]:
+        """Stores texts.
+
+        Args:
+            texts (list[str]): The texts to store.
+
+        Returns:
+            list[str]: The references of the texts, in order.
+        """
+        start = len(self._texts)
+        self._texts.extend(texts)
+        return [f"doc:{idx}" for idx in range(start, len(self._texts))]
+
+    def get(self, refs: list[str]) -> list[str]:
+        """Resolves references to their texts.
+
+        Args:
+            refs (list[str]): The references returned by `put`.
+
+        Returns:
+            list[str]: The referenced texts, in order.
+        """
+        return [self._texts[int(ref.removeprefix("doc:"))] for ref in refs]
@@ -1,30 +1,58 @@
+import asyncio
 import logging
+import sqlite3
 from collections.abc import AsyncGenerator
+from dataclasses import asdict
+from datetime import UTC, datetime
+from functools import cached_property
+from itertools import product
+from pathlib import Path
 from typing import Any, Literal
 
+from langchain_core.language_models import BaseChatModel
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.state import CompiledStateGraph
 from langgraph.types import Send
+from langsmith import tracing_context
 
 from src.config import settings
+from src.graph.adaptive import ADAPTIVE_RESEARCH_KEY, AdaptiveResearch
+from src.graph.cache import CachedResearch, TopicCache
+from src.graph.cassette import (
+    CASSETTE_KEY,
+    Cassette,
+    CassetteChatModel,
+    CassetteSearchBackend,
+)
 from src.graph.constants import (
+    EVENT_REPORT_CHUNK,
     NODE_CONDUCT_RESEARCH,
     NODE_GENERATE_QUERIES,
     NODE_GENERATE_RESEARCH_SUMMARY,
     NODE_SAFETY_CHECK,
     NODE_SEARCH_WEB,
     NODE_WRITE_REPORT,
+    TAG_REPORT_SECTION,
 )
-from src.graph.llms import get_llm
+from src.graph.documents import DOCUMENT_STORE_KEY, DocumentStore
+from src.graph.llms import RoutingChatModel, get_routed_llm
 from src.graph.nodes import (
+    ExtractiveSummaryNode,
     QueryGeneratorNode,
     ReportWriterNode,
     ResearchSummaryNode,
+    SectionedReportWriterNode,
+    StreamingQueryGeneratorNode,
     TopicSafetyCheckNode,
     WebSearchNode,
 )
-from src.graph.nodes.base import NodeError
+from src.graph.nodes.base import BaseNode, NodeError
 from src.graph.states import ResearchGraphState, ResearchSubGraphState
+from src.graph.tracing import TraceSampler
+from src.graph.usage import RunUsageCollector
+from src.reports import ReportStore, StoredReport
+from src.search import SearchBackend, get_search_backend
+from src.shared import SharedState
 
 logger = logging.getLogger(__name__)
 
@@ -36,89 +64,260 @@ _PROGRESS_MAP = {
     NODE_WRITE_REPORT: "Writing report",
 }
 
+# Shared runs are embedded in a thread, then added to the topic cache on the
+# event loop, this many at a time.
+_SHARED_SYNC_PAGE = 32
+
 
 class ResearchGraph:
     """
     The graph for generating queries, conducting research, and writing reports.
     """
 
-    def __init__(self):
-        """Initializes the research graph with language models."""
+    def __init__(
+        self,
+        report_store: ReportStore | None = None,
+        shared_state: SharedState | None = None,
+    ):
+        """Initializes the research graph. Language models and graph variants
+        are created on first use, to keep construction cheap.
+
+        Args:
+            report_store (ReportStore | None): The store completed runs are
+                saved to, if any.
+            shared_state (SharedState | None): The state shared with the other
+                worker processes, if any. Completed runs are shared through it,
+                so the topic cache of every worker serves them.
+        """
         logger.info("[ResearchGraph] Initializing ResearchGraph.")
-        self._groq_tool = get_llm(
-            provider="groq",
-            model=settings.GROQ_LLAMA_70B,
-            temperature=settings.GROQ_LLAMA_70B_TEMPERATURE,
+        self._report_store = report_store
+        self._shared_state = shared_state
+        self._topic_cache = (
+            TopicCache(capacity=settings.APP_TOPIC_CACHE_SIZE)
+            if settings.APP_TOPIC_CACHE_SIZE > 0
+            else None
+        )
+        # Runs shared by other workers are cached apart, so a worker keeps
+        # only the most recent ones, synced in the background.
+        self._shared_cache = (
+            TopicCache(capacity=settings.APP_TOPIC_CACHE_SHARED_SIZE)
+            if self._topic_cache is not None
+            and shared_state is not None
+            and settings.APP_TOPIC_CACHE_SHARED_SIZE > 0
+            else None
         )
+        # Sequence number of the last shared run added to the shared cache
+        self._shared_seq = 0
+        self._shared_sync: asyncio.Task | None = None
 
-        self._groq_stream = get_llm(
-            provider="groq",
-            model=settings.GROQ_LLAMA_70B,
-            temperature=settings.GROQ_LLAMA_70B_TEMPERATURE,
-            streaming=True,
+        self._trace_sampler = TraceSampler(
+            enabled=settings.LANGCHAIN_TRACING_V2 == "true",
+            sample_rate=settings.LANGCHAIN_TRACING_SAMPLE_RATE,
+            project_name=settings.LANGCHAIN_PROJECT,
         )
 
-        self._google = get_llm(
-            provider="google",
-            model=settings.GOOGLE_FLASH,
-            temperature=settings.GOOGLE_FLASH_TEMPERATURE,
+        # Graph variants keyed by (fast, stream_queries, sectioned), built on
+        # first use
+        self._graphs: dict[tuple[bool, bool, bool], CompiledStateGraph] = {}
+
+    # Upstream calls are wrapped to be recorded or replayed with run cassettes
+    @cached_property
+    def _tool_llm(self) -> BaseChatModel:
+        return CassetteChatModel(
+            llm=get_routed_llm(
+                [("groq", settings.GROQ_LLAMA_70B), *settings.llm_tool_fallbacks]
+            ),
+            role="tool",
         )
 
-        self._graph = self._build_graph()
+    @cached_property
+    def _report_llm(self) -> BaseChatModel:
+        return CassetteChatModel(
+            llm=get_routed_llm(
+                [("groq", settings.GROQ_LLAMA_70B), *settings.llm_report_fallbacks],
+                streaming=True,
+            ),
+            role="report",
+        )
 
-    def _build_research_subgraph(self) -> CompiledStateGraph:
+    @cached_property
+    def _summary_llm(self) -> BaseChatModel:
+        return CassetteChatModel(
+            llm=get_routed_llm(
+                [("google", settings.GOOGLE_FLASH), *settings.llm_summary_fallbacks]
+            ),
+            role="summary",
+        )
+
+    @cached_property
+    def _safety_check_node(self) -> TopicSafetyCheckNode:
+        # Shared by all graph variants, so their checks are batched together
+        return TopicSafetyCheckNode(
+            llm=self._tool_llm,
+            batch_window=settings.APP_SAFETY_BATCH_WINDOW,
+            max_batch_size=settings.APP_SAFETY_BATCH_SIZE,
+        )
+
+    @cached_property
+    def _search_backend(self) -> SearchBackend:
+        # Created on first use, so replayed runs need no search credentials
+        return CassetteSearchBackend(
+            lambda: get_search_backend(settings.SEARCH_BACKEND),
+            role="search",
+        )
+
+    def get_llm_metrics(self) -> dict[str, list[dict[str, Any]]]:
+        """Returns the routing statistics of each routed LLM role in use.
+
+        Returns:
+            dict[str, list[dict[str, Any]]]: Backend statistics keyed by role.
+        """
+        roles = {
+            "tool": "_tool_llm",
+            "report": "_report_llm",
+            "summary": "_summary_llm",
+        }
+        return {
+            role: llm.metrics()
+            for role, attr in roles.items()
+            # Only report LLMs created so far, without creating the others
+            if isinstance(
+                llm := getattr(self.__dict__.get(attr), "llm", None), RoutingChatModel
+            )
+        }
+
+    def _build_research_subgraph(self, summary_node: BaseNode) -> CompiledStateGraph:
         """Builds up the research subgraph for conducting web searches and
         generating research summaries based on search queries."""
         logger.info("[ResearchGraph] Building research subgraph.")
         builder = StateGraph(ResearchSubGraphState)
 
-        builder.add_node(NODE_SEARCH_WEB, WebSearchNode())
-        builder.add_node(
-            NODE_GENERATE_RESEARCH_SUMMARY, ResearchSummaryNode(llm=self._google)
-        )
+        builder.add_node(NODE_SEARCH_WEB, WebSearchNode(search=self._search_backend))
+        builder.add_node(NODE_GENERATE_RESEARCH_SUMMARY, summary_node)
 
         builder.add_edge(START, NODE_SEARCH_WEB)
-        builder.add_edge(NODE_SEARCH_WEB, NODE_GENERATE_RESEARCH_SUMMARY)
+        builder.add_conditional_edges(
+            NODE_SEARCH_WEB,
+            self._route_search_results,
+            [NODE_GENERATE_RESEARCH_SUMMARY, END],
+        )
         builder.add_edge(NODE_GENERATE_RESEARCH_SUMMARY, END)
 
         return builder.compile()
 
     @staticmethod
+    def _route_search_results(
+        state: ResearchSubGraphState,
+    ) -> Literal[NODE_GENERATE_RESEARCH_SUMMARY, END]:
+        """Routes to the summary, unless the search was skipped or found nothing."""
+        if not state["search_docs"]:
+            return END
+        return NODE_GENERATE_RESEARCH_SUMMARY
+
+    @classmethod
     def _route_safety_check(
+        cls,
         state: ResearchGraphState,
-    ) -> Literal[NODE_GENERATE_QUERIES, END]:
-        """Routes based on the topic safety check."""
-        return NODE_GENERATE_QUERIES if state["is_safe"] else END
+    ) -> Literal[NODE_GENERATE_QUERIES, END] | list[Send]:
+        """Routes based on the topic safety check, skipping query generation
+        for runs seeded with queries."""
+        if not state["is_safe"]:
+            return END
+        if state.get("queries"):
+            return cls._initiate_research(state)
+        return NODE_GENERATE_QUERIES
 
     @staticmethod
     def _initiate_research(state: ResearchGraphState) -> list[Send]:
         """Initiates the research process with generated queries."""
         queries: list[str] = state["queries"]
-        logger.info(f"[ResearchGraph] Initiating research with {len(queries)} queries.")
+        if research := AdaptiveResearch.from_config():
+            queries = [query for query in queries if research.admit_query(query)]
+        logger.info(
+            "[ResearchGraph] Initiating research with %d queries.", len(queries)
+        )
         return [Send(NODE_CONDUCT_RESEARCH, {"query": query}) for query in queries]
 
-    def _build_graph(self) -> CompiledStateGraph:
-        """Builds the main research graph."""
+    def _build_graph(
+        self, fast: bool, stream_queries: bool, sectioned: bool
+    ) -> CompiledStateGraph:
+        """Builds the main research graph.
+
+        Args:
+            fast (bool): Whether to summarize search docs with local extractive
+                summaries instead of LLM summaries.
+            stream_queries (bool): Whether to start researching each query while
+                the remaining queries are still being generated.
+            sectioned (bool): Whether to write the report sections concurrently
+                from a planned outline.
+        """
         logger.info("[ResearchGraph] Building main graph.")
         builder = StateGraph(ResearchGraphState)
 
-        builder.add_node(NODE_SAFETY_CHECK, TopicSafetyCheckNode(llm=self._groq_tool))
-        builder.add_node(NODE_GENERATE_QUERIES, QueryGeneratorNode(llm=self._groq_tool))
-        builder.add_node(NODE_CONDUCT_RESEARCH, self._build_research_subgraph())
-        builder.add_node(NODE_WRITE_REPORT, ReportWriterNode(llm=self._groq_stream))
+        research_subgraph = self._build_research_subgraph(
+            ExtractiveSummaryNode()
+            if fast
+            else ResearchSummaryNode(
+                llm=self._summary_llm, offload_chars=settings.APP_PROMPT_OFFLOAD_CHARS
+            )
+        )
 
-        builder.add_edge(START, NODE_SAFETY_CHECK)
-        builder.add_conditional_edges(
-            NODE_SAFETY_CHECK, self._route_safety_check, [NODE_GENERATE_QUERIES, END]
+        builder.add_node(NODE_SAFETY_CHECK, self._safety_check_node)
+        builder.add_node(
+            NODE_GENERATE_QUERIES,
+            StreamingQueryGeneratorNode(llm=self._tool_llm, research=research_subgraph)
+            if stream_queries
+            else QueryGeneratorNode(llm=self._tool_llm),
         )
+        builder.add_node(NODE_CONDUCT_RESEARCH, research_subgraph)
+        builder.add_node(
+            NODE_WRITE_REPORT,
+            SectionedReportWriterNode(llm=self._report_llm, outline_llm=self._tool_llm)
+            if sectioned
+            else ReportWriterNode(
+                llm=self._report_llm, offload_chars=settings.APP_PROMPT_OFFLOAD_CHARS
+            ),
+        )
+
+        builder.add_edge(START, NODE_SAFETY_CHECK)
         builder.add_conditional_edges(
-            NODE_GENERATE_QUERIES, self._initiate_research, [NODE_CONDUCT_RESEARCH]
+            NODE_SAFETY_CHECK,
+            self._route_safety_check,
+            [NODE_GENERATE_QUERIES, NODE_CONDUCT_RESEARCH, END],
         )
+        if stream_queries:
+            # Query generation already researched the queries
+            builder.add_edge(NODE_GENERATE_QUERIES, NODE_WRITE_REPORT)
+        else:
+            builder.add_conditional_edges(
+                NODE_GENERATE_QUERIES, self._initiate_research, [NODE_CONDUCT_RESEARCH]
+            )
         builder.add_edge(NODE_CONDUCT_RESEARCH, NODE_WRITE_REPORT)
         builder.add_edge(NODE_WRITE_REPORT, END)
 
         return builder.compile()
 
+    def warm_up(self) -> None:
+        """Builds every graph variant, with their language models, ahead of
+        the first run. Blocks for as long as the build takes, so callers on
+        the event loop run it in a thread, before the graph is used.
+        """
+        for fast, stream_queries, sectioned in product((False, True), repeat=3):
+            self._get_graph(
+                fast=fast, stream_queries=stream_queries, sectioned=sectioned
+            )
+
+    def _get_graph(
+        self, fast: bool, stream_queries: bool, sectioned: bool
+    ) -> CompiledStateGraph:
+        """Returns the graph variant for the given options, building it once."""
+        key = (fast, stream_queries, sectioned)
+        if key not in self._graphs:
+            self._graphs[key] = self._build_graph(
+                fast=fast, stream_queries=stream_queries, sectioned=sectioned
+            )
+        return self._graphs[key]
+
     @staticmethod
     def _handle_event(event: dict[str, Any]) -> dict[str, Any] | None:
         """Handles chain start, graph end, and stream events."""
@@ -142,22 +341,14 @@ class ResearchGraph:
 
                 # Safety error
                 if not output["is_safe"]:
-                    logger.info(
-                        f"[ResearchGraph] '{output['topic']}' is unsafe: "
-                        f"{output['violated_category']}"
+                    return ResearchGraph._unsafe_topic(
+                        output["topic"], output["violated_category"]
                     )
-                    return {
-                        "event": "error",
-                        "data": {
-                            "content": f"Topic is flagged as unsafe: "
-                            f"{output['violated_category']}"
-                        },
-                    }
 
                 # End event
                 logger.info(
-                    f"[ResearchGraph] Research completed for topic: "
-                    f"'{output['topic']}'."
+                    "[ResearchGraph] Research completed for topic: '%s'.",
+                    output["topic"],
                 )
                 return {
                     "event": "end",
@@ -169,34 +360,365 @@ class ResearchGraph:
 
             # report stream
             case "on_chat_model_stream":
-                if event["metadata"]["langgraph_node"] == NODE_WRITE_REPORT:
+                # Sectioned reports are streamed in order with custom events
+                if (
+                    event["metadata"]["langgraph_node"] == NODE_WRITE_REPORT
+                    and TAG_REPORT_SECTION not in event["tags"]
+                ):
                     return {
                         "event": "stream",
                         "data": {"content": event["data"]["chunk"].content},
                     }
+            case "on_custom_event":
+                if name == EVENT_REPORT_CHUNK:
+                    return {
+                        "event": "stream",
+                        "data": {"content": event["data"]["content"]},
+                    }
+
+    def _lookup_cache(
+        self, topic: str, query_count: int, fast: bool
+    ) -> tuple[CachedResearch | None, bool]:
+        """Returns the cached run to reuse for the topic, if any, and whether to
+        serve it as is rather than only seed the new run with its queries."""
+        matches = [
+            match
+            for cache in (self._topic_cache, self._shared_cache)
+            if cache is not None and (match := cache.lookup(topic)) is not None
+        ]
+        if not matches:
+            return None, False
+
+        cached, similarity = max(matches, key=lambda match: match[1])
+        if (
+            len(cached.queries) < query_count
+            or similarity < settings.APP_TOPIC_CACHE_SEED_THRESHOLD
+        ):
+            return None, False
+
+        # Fast reports are only served to fast-mode runs
+        if similarity >= settings.APP_TOPIC_CACHE_SERVE_THRESHOLD and (
+            fast or not cached.fast
+        ):
+            logger.info(
+                "[ResearchGraph] Serving cached research of '%s' (similarity %.2f).",
+                cached.topic,
+                similarity,
+            )
+            return cached, True
+
+        logger.info(
+            "[ResearchGraph] Seeding queries from cached research of "
+            "'%s' (similarity %.2f).",
+            cached.topic,
+            similarity,
+        )
+        return cached, False
+
+    @staticmethod
+    def _unsafe_topic(topic: str, violated_category: str | None) -> dict[str, Any]:
+        """Returns the error event of a topic flagged as unsafe."""
+        logger.info("[ResearchGraph] '%s' is unsafe: %s", topic, violated_category)
+        return {
+            "event": "error",
+            "data": {"content": f"Topic is flagged as unsafe: {violated_category}"},
+        }
 
-    async def astream(self, topic: str, query_count: int) -> AsyncGenerator[dict, None]:
+    async def _serve_cached(
+        self, topic: str, cached: CachedResearch
+    ) -> AsyncGenerator[dict, None]:
+        """Yields the stream events replaying a cached run, once the topic
+        passes the safety check, as a nearly identical topic may still be
+        unsafe."""
+        yield {
+            "event": "progress",
+            "data": {"content": _PROGRESS_MAP[NODE_SAFETY_CHECK]},
+        }
+        try:
+            check = await self._safety_check_node({"topic": topic})
+        except NodeError as e:
+            yield {"event": "error", "data": {"content": str(e)}}
+            return
+        if not check["is_safe"]:
+            yield self._unsafe_topic(topic, check["violated_category"])
+            return
+
+        yield {"event": "progress", "data": {"content": "Found similar research"}}
+        yield {"event": "stream", "data": {"content": cached.report}}
+        yield {
+            "event": "end",
+            "data": {"queries": cached.queries, "run_id": cached.run_id},
+        }
+
+    def _start_shared_sync(self) -> None:
+        """Starts adding the runs completed by other workers to the shared
+        topic cache in the background, unless a sync is already running. Runs
+        do not wait for it, and use the runs synced so far."""
+        if self._shared_cache is None:
+            return
+        if self._shared_sync is None or self._shared_sync.done():
+            self._shared_sync = asyncio.create_task(self._sync_shared_cache())
+
+    async def _sync_shared_cache(self) -> None:
+        """Adds the most recent runs completed by other workers to the shared
+        topic cache."""
+        try:
+            results = await self._shared_state.results_since(
+                self._shared_seq, limit=settings.APP_TOPIC_CACHE_SHARED_SIZE
+            )
+        except sqlite3.Error as e:
+            logger.error("[ResearchGraph] Unable to read shared runs: %s", e)
+            return
+        for start in range(0, len(results), _SHARED_SYNC_PAGE):
+            page = results[start : start + _SHARED_SYNC_PAGE]
+            # Embedding takes most of the time, the cache itself only changes
+            # on the event loop, between lookups
+            embeddings = await asyncio.to_thread(
+                lambda topics: [self._shared_cache.embed(t) for t in topics],
+                [data["topic"] for _, data in page],
+            )
+            for (seq, data), embedding in zip(page, embeddings, strict=True):
+                self._shared_cache.add(
+                    CachedResearch(**data),
+                    replace_above=settings.APP_TOPIC_CACHE_SERVE_THRESHOLD,
+                    embedding=embedding,
+                )
+                self._shared_seq = seq
+
+    async def _cache_research(
+        self,
+        topic: str,
+        query_count: int,
+        end_data: dict[str, Any],
+        report: str,
+        fast: bool,
+    ) -> None:
+        """Adds a completed run to the topic cache, if enabled, and shares it
+        with the other workers."""
+        if self._topic_cache is None:
+            return
+        cached = CachedResearch(
+            topic=topic,
+            query_count=query_count,
+            queries=end_data["queries"],
+            report=report,
+            run_id=str(end_data["run_id"]),
+            fast=fast,
+        )
+        self._topic_cache.add(
+            cached, replace_above=settings.APP_TOPIC_CACHE_SERVE_THRESHOLD
+        )
+        if self._shared_state is None:
+            return
+        try:
+            await self._shared_state.add_result(asdict(cached))
+        except sqlite3.Error as e:
+            logger.error(
+                "[ResearchGraph] Unable to share run '%s': %s", cached.run_id, e
+            )
+
+    async def _store_report(
+        self,
+        topic: str,
+        end_data: dict[str, Any],
+        report: str,
+        summaries: list[str],
+    ) -> None:
+        """Saves a completed run to the report store, if any."""
+        if self._report_store is None:
+            return
+        try:
+            await self._report_store.save(
+                StoredReport(
+                    run_id=str(end_data["run_id"]),
+                    topic=topic,
+                    queries=end_data["queries"],
+                    summaries=summaries,
+                    report=report,
+                    created_at=datetime.now(UTC).isoformat(),
+                )
+            )
+        except OSError as e:
+            logger.error(
+                "[ResearchGraph] Unable to store report of run '%s': %s",
+                end_data["run_id"],
+                e,
+            )
+
+    @staticmethod
+    async def _save_cassette(cassette: Cassette | None, run_id: Any) -> None:
+        """Saves the cassette recorded for a completed run, if any."""
+        if cassette is None or cassette.replaying:
+            return
+        path = Path(settings.APP_CASSETTE_DIR) / f"{run_id}.jsonl"
+        try:
+            await asyncio.to_thread(cassette.save, path)
+        except OSError as e:
+            logger.error(
+                "[ResearchGraph] Unable to save cassette of run '%s': %s", run_id, e
+            )
+
+    def _record_untraced_run(self, traced: bool, **run: Any) -> None:
+        """Records a run that was not traced in full as a root-only run."""
+        if not traced:
+            self._trace_sampler.record_run(name="ResearchGraph", **run)
+
+    @staticmethod
+    def _add_run_summary(
+        topic: str,
+        end_data: dict[str, Any],
+        usage: RunUsageCollector,
+        research: AdaptiveResearch | None,
+    ) -> None:
+        """Adds the usage and adaptive research savings to the end event data."""
+        end_data["usage"] = usage.summary()
+        logger.info(
+            "[ResearchGraph] Usage for topic '%s': %s", topic, end_data["usage"]
+        )
+        if research is not None:
+            end_data["adaptive"] = research.report()
+            logger.info(
+                "[ResearchGraph] Adaptive research for topic '%s': %s",
+                topic,
+                end_data["adaptive"],
+            )
+
+    async def astream(
+        self,
+        topic: str,
+        query_count: int,
+        fast: bool = False,
+        stream_queries: bool = False,
+        trace: bool = False,
+        adaptive: bool = False,
+        sectioned: bool = False,
+        cassette: Cassette | None = None,
+    ) -> AsyncGenerator[dict, None]:
         """Asynchronously streams research progress and the final report.
 
+        Runs on topics nearly identical to a cached one, completed by any
+        worker, are served from the topic cache once the topic passes the
+        safety check; runs on similar topics reuse the cached queries. Completed
+        runs are saved to the report store before their end event is yielded,
+        and their upstream calls are recorded to `APP_CASSETTE_DIR`, if set.
+
         Args:
             topic (str): The topic to conduct research on.
             query_count (int): The number of queries to generate.
+            fast (bool): Whether to summarize search docs with local extractive
+                summaries instead of LLM summaries.
+            stream_queries (bool): Whether to start researching each query while
+                the remaining queries are still being generated.
+            trace (bool): Whether to trace the run in full, regardless of the
+                trace sample rate.
+            adaptive (bool): Whether to skip near-duplicate queries and stop
+                searching once results stop adding novel content.
+            sectioned (bool): Whether to plan an outline and write the report
+                sections concurrently, streaming them in document order.
+            cassette (Cassette | None): The recorded upstream calls to replay
+                the run with, instead of calling the LLMs and search backend.
 
         Yields:
             dict: A dictionary containing the event and data for the stream.
         """
         logger.info(
-            f"[ResearchGraph] Starting research for topic:"
-            f" '{topic}' with {query_count} queries."
+            "[ResearchGraph] Starting research for topic: '%s' with %d queries%s.",
+            topic,
+            query_count,
+            " in fast mode" if fast else "",
+        )
+        graph = self._get_graph(
+            fast=fast, stream_queries=stream_queries, sectioned=sectioned
+        )
+        graph_input = {"topic": topic, "query_count": query_count}
+
+        self._start_shared_sync()
+        cached, serve = self._lookup_cache(topic, query_count, fast)
+        if serve:
+            async for e in self._serve_cached(topic, cached):
+                yield e
+            return
+        if cached:
+            graph_input["queries"] = cached.queries[:query_count]
+        elif cassette is None and settings.APP_CASSETTE_DIR:
+            # Runs seeded from the cache are not recorded, as they skip calls
+            cassette = Cassette(
+                run={
+                    "topic": topic,
+                    "query_count": query_count,
+                    "fast": fast,
+                    "stream_queries": stream_queries,
+                    "adaptive": adaptive,
+                    "sectioned": sectioned,
+                }
+            )
+
+        traced = self._trace_sampler.sample(force=trace)
+        start_time = datetime.now(UTC)
+        run_id: str | None = None
+        report: list[str] = []
+        usage = RunUsageCollector(prices=settings.LLM_TOKEN_PRICES)
+        documents = DocumentStore()
+        research = (
+            AdaptiveResearch(
+                query_similarity=settings.APP_ADAPTIVE_QUERY_SIMILARITY,
+                novelty_threshold=settings.APP_ADAPTIVE_NOVELTY_THRESHOLD,
+                min_searches=settings.APP_ADAPTIVE_MIN_SEARCHES,
+            )
+            if adaptive
+            else None
         )
         try:
-            async for event in self._graph.astream_events(
-                input={"topic": topic, "query_count": query_count}, version="v2"
-            ):
-                if e := self._handle_event(event):
-                    yield e
+            with tracing_context(enabled=traced):
+                async for event in graph.astream_events(
+                    input=graph_input,
+                    config={
+                        "callbacks": [usage],
+                        "configurable": {
+                            ADAPTIVE_RESEARCH_KEY: research,
+                            DOCUMENT_STORE_KEY: documents,
+                            CASSETTE_KEY: cassette,
+                        },
+                    },
+                    version="v2",
+                ):
+                    # The first event is the start of the root run
+                    run_id = run_id or event["run_id"]
+                    if e := self._handle_event(event):
+                        if e["event"] == "stream":
+                            report.append(e["data"]["content"])
+                        elif e["event"] == "end":
+                            self._add_run_summary(topic, e["data"], usage, research)
+                            await self._cache_research(
+                                topic, query_count, e["data"], "".join(report), fast
+                            )
+                            await self._store_report(
+                                topic,
+                                e["data"],
+                                "".join(report),
+                                documents.get(event["data"]["output"]["summaries"]),
+                            )
+                            await self._save_cassette(cassette, e["data"]["run_id"])
+                            self._record_untraced_run(
+                                traced,
+                                run_id=run_id,
+                                start_time=start_time,
+                                inputs=graph_input,
+                                outputs={
+                                    "queries": e["data"]["queries"],
+                                    "report": "".join(report),
+                                },
+                            )
+                        yield e
         except Exception as e:
-            logger.error(f"[ResearchGraph] Error during research streaming: {str(e)}")
+            logger.error("[ResearchGraph] Error during research streaming: %s", e)
+            self._record_untraced_run(
+                traced,
+                run_id=run_id,
+                start_time=start_time,
+                inputs=graph_input,
+                error=repr(e),
+            )
 
             yield {
                 "event": "error",
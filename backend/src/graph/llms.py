@@ -1,13 +1,30 @@
-from typing import Literal
+import asyncio
+import contextlib
+import logging
+import random
+import time
+from collections.abc import AsyncIterator, Sequence
+from dataclasses import dataclass
+from typing import Any, Literal
 
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
 from langchain_core.language_models import BaseChatModel
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_groq import ChatGroq
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable
+from pydantic import PrivateAttr
 
+from src.config import settings
 
-def get_llm(
-    provider: Literal["groq", "google"], *, model: str, **config
-) -> BaseChatModel:
+logger = logging.getLogger(__name__)
+
+Provider = Literal["groq", "google"]
+
+
+def get_llm(provider: Provider, *, model: str, **config) -> BaseChatModel:
     """Returns a LangChain chat model instance based on the given provider and model.
     The returned instance is configured with the given keyword arguments.
 
@@ -22,11 +39,338 @@ def get_llm(
     Raises:
         ValueError: If the provider is not recognized.
     """
+    # Provider packages are slow to import, so only the used ones are imported.
     match provider:
         case "google":
+            from langchain_google_genai import ChatGoogleGenerativeAI
+
             llm = ChatGoogleGenerativeAI(model=model, **config)
         case "groq":
+            from langchain_groq import ChatGroq
+
             llm = ChatGroq(model=model, **config)
         case _:
             raise ValueError(f"Unknown LLM provider: {provider}")
     return llm
+
+
+def get_provider_config(provider: Provider, *, streaming: bool = False) -> dict:
+    """Returns the configuration of a provider's chat models, from the settings.
+
+    Temperatures are set per provider, so a fallback model is configured like
+    its provider's primary model, rather than like the model it stands in for.
+
+    Args:
+        provider (Literal["groq", "google"]): The provider.
+        streaming (bool): Whether the model streams its output, even when
+            invoked. Only set for providers that support the option, others
+            stream when called through `astream`.
+
+    Returns:
+        dict: The configuration parameters of the provider's chat models.
+
+    Raises:
+        ValueError: If the provider is not recognized.
+    """
+    match provider:
+        case "google":
+            return {"temperature": settings.GOOGLE_FLASH_TEMPERATURE}
+        case "groq":
+            return {
+                "temperature": settings.GROQ_LLAMA_70B_TEMPERATURE,
+                "streaming": streaming,
+            }
+        case _:
+            raise ValueError(f"Unknown LLM provider: {provider}")
+
+
+def get_routed_llm(
+    candidates: Sequence[tuple[Provider, str]], *, streaming: bool = False
+) -> BaseChatModel:
+    """Returns a chat model that routes each call across the given candidates.
+    Every candidate is configured for its own provider, see
+    `get_provider_config`. A single candidate is returned as a plain chat
+    model, without routing.
+
+    Args:
+        candidates (Sequence[tuple[Provider, str]]): `(provider, model)` pairs,
+            in order of preference.
+        streaming (bool): Whether the candidates stream their output, even
+            when invoked.
+
+    Returns:
+        BaseChatModel: The routing chat model, or the only candidate.
+
+    Raises:
+        ValueError: If no candidates are given.
+    """
+    if not candidates:
+        raise ValueError("At least one LLM candidate is required.")
+
+    backends = [
+        get_llm(
+            provider=provider,
+            model=model,
+            **get_provider_config(provider, streaming=streaming),
+        )
+        for provider, model in candidates
+    ]
+    if len(backends) == 1:
+        return backends[0]
+
+    return RoutingChatModel(
+        backends=backends,
+        backend_names=[f"{provider}:{model}" for provider, model in candidates],
+        timeout=settings.LLM_ROUTER_TIMEOUT,
+        alpha=settings.LLM_ROUTER_EWMA_ALPHA,
+        error_threshold=settings.LLM_ROUTER_ERROR_THRESHOLD,
+        cooldown=settings.LLM_ROUTER_COOLDOWN,
+        explore_rate=settings.LLM_ROUTER_EXPLORE_RATE,
+    )
+
+
+class RoutingError(Exception):
+    """Raised when every routed backend fails."""
+
+    pass
+
+
+@dataclass
+class _BackendStats:
+    """Live latency and error-rate statistics of a routed backend."""
+
+    latency: float | None = None  # EWMA latency in seconds
+    error_rate: float = 0.0  # EWMA error rate in [0, 1]
+    calls: int = 0
+    failures: int = 0
+    last_failure: float = 0.0
+
+    def record_success(self, latency: float, alpha: float) -> None:
+        self.calls += 1
+        self.latency = (
+            latency
+            if self.latency is None
+            else alpha * latency + (1 - alpha) * self.latency
+        )
+        self.error_rate *= 1 - alpha
+
+    def record_failure(self, alpha: float) -> None:
+        self.calls += 1
+        self.failures += 1
+        self.error_rate = alpha + (1 - alpha) * self.error_rate
+        self.last_failure = time.monotonic()
+
+
+class RoutingChatModel(BaseChatModel):
+    """Chat model that sends each call to the fastest healthy backend.
+
+    Every backend keeps an EWMA of its latency (time to first chunk when
+    streaming) and error rate. A backend whose error rate reaches
+    `error_threshold` is skipped until `cooldown` seconds after its last failure.
+    Calls that error or exceed `timeout` fail over to the next backend in line.
+    Backends without any latency sample yet are tried first, so every backend
+    is measured at least once. A share `explore_rate` of calls is first sent to
+    a random other healthy backend, so the latency of a backend that was once
+    slow is measured again rather than kept forever. Responses name the model
+    of the backend that served them in their `model_name` response metadata.
+    """
+
+    backends: list[BaseChatModel]
+    backend_names: list[str]
+    timeout: float | None = None
+    alpha: float = 0.3
+    error_threshold: float = 0.5
+    cooldown: float = 30.0
+    explore_rate: float = 0.05
+
+    _stats: list[_BackendStats] = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        self._stats = [_BackendStats() for _ in self.backends]
+
+    @property
+    def _llm_type(self) -> str:
+        return "routing"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return {"backends": self.backend_names}
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Runnable:
+        """Binds the tools to every backend, in each backend's own tool format."""
+        backend_kwargs = [
+            backend.bind_tools(tools, **kwargs).kwargs for backend in self.backends
+        ]
+        return self.bind(backend_kwargs=backend_kwargs)
+
+    def metrics(self) -> list[dict[str, Any]]:
+        """Returns the routing statistics of every backend, in routing order.
+
+        Returns:
+            list[dict[str, Any]]: Name, health, EWMA latency, error rate and
+                call counts of each backend.
+        """
+        return [
+            {
+                "backend": self.backend_names[idx],
+                "healthy": self._is_healthy(idx),
+                "latency_ms": (
+                    None
+                    if self._stats[idx].latency is None
+                    else round(self._stats[idx].latency * 1000, 1)
+                ),
+                "error_rate": round(self._stats[idx].error_rate, 3),
+                "calls": self._stats[idx].calls,
+                "failures": self._stats[idx].failures,
+            }
+            for idx in self._route()
+        ]
+
+    def _is_healthy(self, idx: int) -> bool:
+        stats = self._stats[idx]
+        return (
+            stats.error_rate < self.error_threshold
+            or time.monotonic() - stats.last_failure >= self.cooldown
+        )
+
+    def _route(self) -> list[int]:
+        """Returns backend indexes in the order they should be tried."""
+        healthy = [idx for idx in range(len(self.backends)) if self._is_healthy(idx)]
+        unhealthy = [idx for idx in range(len(self.backends)) if idx not in healthy]
+        healthy.sort(key=lambda idx: self._stats[idx].latency or 0.0)
+        unhealthy.sort(key=lambda idx: self._stats[idx].error_rate)
+        if len(healthy) > 1 and random.random() < self.explore_rate:
+            probe = healthy.pop(random.randrange(1, len(healthy)))
+            healthy.insert(0, probe)
+        return healthy + unhealthy
+
+    def _call_kwargs(
+        self, idx: int, backend_kwargs: list[dict[str, Any]] | None, **kwargs: Any
+    ) -> dict[str, Any]:
+        return {**kwargs, **(backend_kwargs[idx] if backend_kwargs else {})}
+
+    def _model_name(self, idx: int) -> str:
+        return self.backend_names[idx].partition(":")[2]
+
+    def _stamp_model(self, idx: int, result: ChatResult) -> ChatResult:
+        """Names the serving backend's model in the response metadata of every
+        generation that does not name one, so usage is priced per backend."""
+        for generation in result.generations:
+            generation.message.response_metadata.setdefault(
+                "model_name", self._model_name(idx)
+            )
+        return result
+
+    def _on_failure(self, idx: int, e: BaseException) -> None:
+        self._stats[idx].record_failure(self.alpha)
+        logger.warning(
+            "[RoutingChatModel] Backend '%s' failed: %r, failing over.",
+            self.backend_names[idx],
+            e,
+        )
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        backend_kwargs: list[dict[str, Any]] | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        error: Exception | None = None
+        for idx in self._route():
+            start = time.perf_counter()
+            try:
+                result = self.backends[idx]._generate(
+                    messages,
+                    stop=stop,
+                    **self._call_kwargs(idx, backend_kwargs, **kwargs),
+                )
+            except Exception as e:
+                self._on_failure(idx, e)
+                error = e
+                continue
+            self._stats[idx].record_success(time.perf_counter() - start, self.alpha)
+            return self._stamp_model(idx, result)
+        raise RoutingError("All LLM backends failed.") from error
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        backend_kwargs: list[dict[str, Any]] | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        error: Exception | None = None
+        for idx in self._route():
+            start = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(
+                    self.backends[idx]._agenerate(
+                        messages,
+                        stop=stop,
+                        **self._call_kwargs(idx, backend_kwargs, **kwargs),
+                    ),
+                    timeout=self.timeout,
+                )
+            except Exception as e:
+                self._on_failure(idx, e)
+                error = e
+                continue
+            self._stats[idx].record_success(time.perf_counter() - start, self.alpha)
+            return self._stamp_model(idx, result)
+        raise RoutingError("All LLM backends failed.") from error
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        backend_kwargs: list[dict[str, Any]] | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        # Failover is only possible until the first chunk has been yielded,
+        # so the timeout and the latency sample cover the time to first chunk.
+        error: Exception | None = None
+        for idx in self._route():
+            start = time.perf_counter()
+            stream = self.backends[idx]._astream(
+                messages, stop=stop, **self._call_kwargs(idx, backend_kwargs, **kwargs)
+            )
+            try:
+                first = await asyncio.wait_for(anext(stream), timeout=self.timeout)
+            except StopAsyncIteration:
+                self._stats[idx].record_success(time.perf_counter() - start, self.alpha)
+                return
+            except Exception as e:
+                self._on_failure(idx, e)
+                error = e
+                # Closed before failing over, so the backend's connection is
+                # released now rather than when the stream is garbage collected
+                with contextlib.suppress(Exception):
+                    await stream.aclose()
+                continue
+            latency = time.perf_counter() - start
+
+            yield first
+            named = "model_name" in first.message.response_metadata
+            try:
+                async for chunk in stream:
+                    named = named or "model_name" in chunk.message.response_metadata
+                    yield chunk
+            except Exception:
+                self._stats[idx].record_failure(self.alpha)
+                raise
+            self._stats[idx].record_success(latency, self.alpha)
+            # Metadata strings of chunks are concatenated when merged, so the
+            # model is named in a chunk of its own, only if no chunk named it
+            if not named:
+                yield ChatGenerationChunk(
+                    message=AIMessageChunk(
+                        content="",
+                        response_metadata={"model_name": self._model_name(idx)},
+                    )
+                )
+            return
+        raise RoutingError("All LLM backends failed.") from error
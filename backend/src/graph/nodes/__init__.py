@@ -1,13 +1,18 @@
-from .query_generator import QueryGeneratorNode
+from .extractive_summary import ExtractiveSummaryNode
+from .query_generator import QueryGeneratorNode, StreamingQueryGeneratorNode
 from .report_writer import ReportWriterNode
 from .research_summary import ResearchSummaryNode
 from .safety_check import TopicSafetyCheckNode
+from .sectioned_report_writer import SectionedReportWriterNode
 from .web_search import WebSearchNode
 
 __all__ = [
+    "ExtractiveSummaryNode",
     "QueryGeneratorNode",
     "ReportWriterNode",
     "ResearchSummaryNode",
+    "SectionedReportWriterNode",
+    "StreamingQueryGeneratorNode",
     "TopicSafetyCheckNode",
     "WebSearchNode",
 ]
@@ -1,4 +1,6 @@
+import asyncio
 from abc import ABC, abstractmethod
+from collections.abc import Callable
 from typing import Any
 
 from src.graph.states import AnyGraphState
@@ -32,3 +34,24 @@ class NodeError(Exception):
     """Base class for exceptions raised by nodes."""
 
     pass
+
+
+async def run_sized[T](
+    size: int, threshold: int, fn: Callable[..., T], *args: Any
+) -> T:
+    """Runs CPU-bound work on a payload in a thread once the payload reaches a
+    size, so it does not hold up the event loop, and inline below it, where the
+    thread hand-off costs more than the work.
+
+    Args:
+        size (int): The payload size, in characters.
+        threshold (int): The size from which the work runs in a thread.
+        fn (Callable[..., T]): The work, which must not use the event loop.
+        *args: The arguments of `fn`.
+
+    Returns:
+        T: The result of `fn`.
+    """
+    if size >= threshold:
+        return await asyncio.to_thread(fn, *args)
+    return fn(*args)
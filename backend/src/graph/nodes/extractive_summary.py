@@ -0,0 +1,227 @@
+import asyncio
+import logging
+import re
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.graph.documents import DocumentStore
+from src.graph.nodes.base import BaseNode
+from src.graph.states import ResearchSubGraphState
+
+logger = logging.getLogger(__name__)
+
+_DOCUMENT_PATTERN = re.compile(
+    r'<Document href="(?P<url>[^"]*)"/?>\n(?P<content>.*?)\n</Document>', re.DOTALL
+)
+_SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    {
+        "a",
+        "an",
+        "and",
+        "are",
+        "as",
+        "at",
+        "be",
+        "by",
+        "for",
+        "from",
+        "has",
+        "have",
+        "in",
+        "is",
+        "it",
+        "its",
+        "of",
+        "on",
+        "or",
+        "that",
+        "the",
+        "this",
+        "to",
+        "was",
+        "were",
+        "which",
+        "will",
+        "with",
+    }
+)
+
+
+def _tokenize(text: str) -> list[str]:
+    return [
+        token
+        for token in _TOKEN_PATTERN.findall(text.lower())
+        if token not in _STOPWORDS
+    ]
+
+
+@dataclass
+class _TermVectors:
+    """L2-normalized TF-IDF vectors of sentences, stored sparsely: the terms of
+    sentence `i` are `cols[indptr[i]:indptr[i + 1]]`, with their `weights`."""
+
+    indptr: np.ndarray
+    cols: np.ndarray
+    weights: np.ndarray
+    dim: int  # The vocabulary size
+
+    def row(self, idx: int) -> tuple[np.ndarray, np.ndarray]:
+        start, end = self.indptr[idx], self.indptr[idx + 1]
+        return self.cols[start:end], self.weights[start:end]
+
+
+class ExtractiveSummaryNode(BaseNode):
+    """
+    Node responsible for summarizing search docs locally, without an LLM.
+
+    Sentences are scored by TF-IDF cosine similarity to the query and to the
+    centroid of all sentences, then picked greedily while skipping near-duplicates
+    of already picked ones. The summary keeps the `[n]` source attribution of the
+    LLM research summaries, so reports cite it the same way.
+    """
+
+    def __init__(
+        self,
+        max_words: int = 350,
+        min_sentence_words: int = 6,
+        max_sentence_words: int = 80,
+        query_weight: float = 0.7,
+        redundancy_threshold: float = 0.7,
+    ):
+        self._max_words = max_words
+        self._min_sentence_words = min_sentence_words
+        self._max_sentence_words = max_sentence_words
+        self._query_weight = query_weight
+        self._redundancy_threshold = redundancy_threshold
+
+    def _split_sentences(
+        self, search_docs: list[str]
+    ) -> tuple[list[str], list[int], list[str]]:
+        """Splits the search docs into sentences, their source indexes and the
+        source URLs."""
+        urls: list[str] = []
+        sentences: list[str] = []
+        sources: list[int] = []
+        for match in _DOCUMENT_PATTERN.finditer("\n".join(search_docs)):
+            urls.append(match["url"])
+            content = " ".join(match["content"].split())
+            for sentence in _SENTENCE_PATTERN.split(content):
+                word_count = len(sentence.split())
+                if self._min_sentence_words <= word_count <= self._max_sentence_words:
+                    sentences.append(sentence)
+                    sources.append(len(urls) - 1)
+        return sentences, sources, urls
+
+    def _rank(
+        self, query: str, sentences: list[str]
+    ) -> tuple[np.ndarray, _TermVectors]:
+        """Returns sentence scores and the sparse sentence vectors."""
+        tokens = [_tokenize(sentence) for sentence in sentences]
+        vocabulary: dict[str, int] = {}
+        ids = [[vocabulary.setdefault(t, len(vocabulary)) for t in ts] for ts in tokens]
+        count, dim = len(sentences), len(vocabulary)
+
+        rows = np.repeat(np.arange(count), [len(ts) for ts in ids])
+        cols = np.fromiter(
+            (i for ts in ids for i in ts), dtype=np.intp, count=len(rows)
+        )
+        # Term counts per sentence, as (sentence, term) pairs sorted by sentence
+        pairs, tf = np.unique(rows * dim + cols, return_counts=True)
+        rows, cols = np.divmod(pairs, max(dim, 1))
+
+        df = np.bincount(cols, minlength=dim)
+        idf = np.log((1 + count) / (1 + df)) + 1
+        weights = tf * idf[cols]
+        weights /= np.sqrt(np.bincount(rows, weights**2, minlength=count))[rows] + 1e-9
+
+        query_vector = np.zeros(dim)
+        for token in _tokenize(query):
+            if (idx := vocabulary.get(token)) is not None:
+                query_vector[idx] += idf[idx]
+        query_vector /= np.linalg.norm(query_vector) + 1e-9
+
+        centroid = np.bincount(cols, weights, minlength=dim) / count
+        centroid /= np.linalg.norm(centroid) + 1e-9
+
+        scores = self._query_weight * np.bincount(
+            rows, weights * query_vector[cols], minlength=count
+        ) + (1 - self._query_weight) * np.bincount(
+            rows, weights * centroid[cols], minlength=count
+        )
+        vectors = _TermVectors(
+            indptr=np.searchsorted(rows, np.arange(count + 1)),
+            cols=cols,
+            weights=weights,
+            dim=dim,
+        )
+        return scores, vectors
+
+    def _select(
+        self, sentences: list[str], scores: np.ndarray, vectors: _TermVectors
+    ) -> list[int]:
+        """Greedily picks the best sentences within the word budget."""
+        # Every pick adds at least `min_sentence_words` to the budget, so at most
+        # this many are picked. Candidates are only compared to the picked ones.
+        picked = np.zeros(
+            (self._max_words // self._min_sentence_words + 1, vectors.dim)
+        )
+        selected: list[int] = []
+        word_count = 0
+        for idx in np.argsort(-scores).tolist():
+            if word_count >= self._max_words:
+                break
+            cols, weights = vectors.row(idx)
+            if (
+                selected
+                and (picked[: len(selected), cols] @ weights).max()
+                >= self._redundancy_threshold
+            ):
+                continue
+            picked[len(selected), cols] = weights
+            selected.append(idx)
+            word_count += len(sentences[idx].split())
+        return sorted(selected)
+
+    async def _arun(self, state: ResearchSubGraphState) -> dict[str, list[str]]:
+        query = state["query"]
+
+        logger.info(
+            "[ExtractiveSummaryNode] Generating extractive summary for query: "
+            "'%s' with %d documents.",
+            query,
+            len(state["search_docs"]),
+        )
+
+        documents = DocumentStore.from_config()
+        # Ranking tokenizes and scores every sentence, off the event loop
+        summary = await asyncio.to_thread(
+            self._summarize, query, documents.get(state["search_docs"])
+        )
+        return {"summaries": documents.put([summary])}
+
+    def _summarize(self, query: str, search_docs: list[str]) -> str:
+        """Summarizes the search docs of a query. Blocking, run in a thread."""
+        sentences, sources, urls = self._split_sentences(search_docs)
+        selected = (
+            self._select(sentences, *self._rank(query, sentences)) if sentences else []
+        )
+
+        # Number the cited sources in order of first citation, as [1], [2], ...
+        citations: dict[int, int] = {}
+        for idx in selected:
+            citations.setdefault(sources[idx], len(citations) + 1)
+
+        findings = "\n".join(
+            f"- {sentences[idx]} [{citations[sources[idx]]}]" for idx in selected
+        )
+        references = "\n".join(
+            f"- [{n}] {urls[source]}" for source, n in citations.items()
+        )
+        return (
+            f"## Query Analysis\n{query}\n\n"
+            f"## Key Findings\n{findings or 'No relevant findings.'}\n\n"
+            f"## Sources\n{references}"
+        )
@@ -1,9 +1,16 @@
+import asyncio
 import logging
+import re
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+from typing import Any
 
 from langchain_core.language_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable
 from pydantic import BaseModel, Field
 
+from src.graph.adaptive import AdaptiveResearch
 from src.graph.nodes.base import BaseNode, NodeError
 from src.graph.states import ResearchGraphState
 
@@ -26,6 +33,13 @@ Your expertise includes:
 _USER_MESSAGE = """Generate {query_count} strategic search queries for use in web-search that form an objective opinion from the topic: {topic}
 Avoid redundancy between queries"""  # noqa: E501
 
+_STREAM_USER_MESSAGE = f"""{_USER_MESSAGE}
+Return only the queries, one per line, without numbering, bullets or quotes."""
+
+# Leading list markers such as "1.", "2)", "-" or "*", and surrounding quotes
+_QUERY_MARKERS = re.compile(r"^(?:\d+[.)]|[-*•])\s*")
+_QUERY_QUOTES = "\"'`"
+
 
 class QueryGeneratorNode(BaseNode):
     """Node responsible for generating search queries based on a research topic."""
@@ -44,8 +58,9 @@ class QueryGeneratorNode(BaseNode):
         query_count = state["query_count"]
 
         logger.info(
-            f"[QueryGeneratorNode] Generating {query_count} "
-            f"queries for topic: '{topic}'."
+            "[QueryGeneratorNode] Generating %d queries for topic: '%s'.",
+            query_count,
+            topic,
         )
 
         try:
@@ -53,7 +68,117 @@ class QueryGeneratorNode(BaseNode):
                 {"topic": topic, "query_count": query_count}
             )
         except Exception as e:
-            logger.error(f"[QueryGeneratorNode] Error during query generation: {e}")
+            logger.error("[QueryGeneratorNode] Error during query generation: %s", e)
             raise NodeError("Unable to generate queries. Please try again.") from e
 
         return queries.model_dump()
+
+
+class StreamingQueryGeneratorNode(BaseNode):
+    """Node responsible for generating search queries and researching them,
+    starting the research of each query as soon as the model has written it.
+
+    Queries are parsed line by line from the streamed model output. The
+    research summaries of all queries are returned in query order.
+    """
+
+    def __init__(self, llm: BaseChatModel, research: Runnable):
+        prompt = ChatPromptTemplate.from_messages(
+            [
+                ("system", _SYSTEM_MESSAGE),
+                ("user", _STREAM_USER_MESSAGE),
+            ],
+        )
+        self._chain = prompt | llm
+        self._research = research
+
+    @staticmethod
+    def _parse_query(line: str) -> str | None:
+        """Returns the query written on a line of model output, if any."""
+        query = _QUERY_MARKERS.sub("", line.strip()).strip(_QUERY_QUOTES).strip()
+        # Skip empty lines and preambles such as "Here are the queries:"
+        if not query or query.endswith(":"):
+            return None
+        return query
+
+    async def _astream_queries(
+        self, topic: str, query_count: int
+    ) -> AsyncIterator[str]:
+        """Yields unique queries as soon as each one is complete."""
+        queries: set[str] = set()
+        buffer = ""
+        # Closed on early return, so the model stream stops once all queries
+        # are in, rather than when it is garbage collected
+        async with aclosing(
+            self._chain.astream({"topic": topic, "query_count": query_count})
+        ) as chunks:
+            async for chunk in chunks:
+                buffer += chunk.content
+                *lines, buffer = buffer.split("\n")
+                for line in lines:
+                    if (query := self._parse_query(line)) and query not in queries:
+                        queries.add(query)
+                        yield query
+                        if len(queries) == query_count:
+                            return
+
+        if (query := self._parse_query(buffer)) and query not in queries:
+            yield query
+
+    async def _arun(self, state: ResearchGraphState) -> dict[str, Any]:
+        topic = state["topic"]
+        query_count = state["query_count"]
+
+        logger.info(
+            "[StreamingQueryGeneratorNode] Generating %d queries for topic: '%s'.",
+            query_count,
+            topic,
+        )
+
+        research = AdaptiveResearch.from_config()
+        queries: list[str] = []
+        tasks: list[asyncio.Task] = []
+        try:
+            try:
+                async with aclosing(
+                    self._astream_queries(topic, query_count)
+                ) as stream_queries:
+                    async for query in stream_queries:
+                        if research is not None and not research.admit_query(query):
+                            logger.info(
+                                "[StreamingQueryGeneratorNode] Skipping duplicate "
+                                "query: '%s'.",
+                                query,
+                            )
+                            continue
+                        logger.info(
+                            "[StreamingQueryGeneratorNode] Starting research for "
+                            "query: '%s'.",
+                            query,
+                        )
+                        queries.append(query)
+                        tasks.append(
+                            asyncio.create_task(
+                                self._research.ainvoke({"query": query})
+                            )
+                        )
+            except Exception as e:
+                logger.error(
+                    "[StreamingQueryGeneratorNode] Error during query generation: %s",
+                    e,
+                )
+                raise NodeError("Unable to generate queries. Please try again.") from e
+
+            if not queries:
+                raise NodeError("Unable to generate queries. Please try again.")
+            results = await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        return {
+            "queries": queries,
+            "summaries": [
+                summary for result in results for summary in result["summaries"]
+            ],
+        }
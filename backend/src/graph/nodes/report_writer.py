@@ -1,9 +1,11 @@
 import logging
 
 from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
 from langchain_core.prompts import ChatPromptTemplate
 
-from src.graph.nodes.base import BaseNode, NodeError
+from src.graph.documents import DocumentStore
+from src.graph.nodes.base import BaseNode, NodeError, run_sized
 from src.graph.states import ResearchGraphState
 
 logger = logging.getLogger(__name__)
@@ -85,34 +87,52 @@ RETURN ONLY THE COMPLETE REPORT WITH NO ADDITIONAL COMMENTARY."""  # noqa: E501
 class ReportWriterNode(BaseNode):
     """Node responsible for generating complete research reports."""
 
-    def __init__(self, llm: BaseChatModel):
-        prompt = ChatPromptTemplate.from_messages(
+    def __init__(self, llm: BaseChatModel, offload_chars: int = 1_000_000):
+        """Initializes the node.
+
+        Args:
+            llm (BaseChatModel): The model writing the report.
+            offload_chars (int): The size of the research memos, in characters,
+                from which the prompt is assembled in a thread.
+        """
+        self._prompt = ChatPromptTemplate.from_messages(
             [
                 ("system", _SYSTEM_MESSAGE),
                 ("user", _USER_MESSAGE),
             ],
         )
-        self._chain = prompt | llm
-
-    async def _arun(self, state: ResearchGraphState) -> dict[str, str]:
-        topic = state["topic"]
-        research_summaries = state["summaries"]
+        self._llm = llm
+        self._offload_chars = offload_chars
 
+    def _format_prompt(self, topic: str, memos: list[str]) -> list[BaseMessage]:
         research = "\n-----\n".join(
             [
                 f"<MEMO [{idx}]>\n{memo}\n</MEMO [{idx}]>"
-                for idx, memo in enumerate(research_summaries)
+                for idx, memo in enumerate(memos)
             ]
         )
+        return self._prompt.format_messages(topic=topic, research=research)
+
+    async def _arun(self, state: ResearchGraphState) -> dict[str, str]:
+        topic = state["topic"]
+        research_summaries = DocumentStore.from_config().get(state["summaries"])
+        messages = await run_sized(
+            sum(map(len, research_summaries)),
+            self._offload_chars,
+            self._format_prompt,
+            topic,
+            research_summaries,
+        )
         logger.info(
-            f"[ReportWriterNode] Generating report for topic: '{topic}' with "
-            f"{len(research_summaries)} summaries."
+            "[ReportWriterNode] Generating report for topic: '%s' with %d summaries.",
+            topic,
+            len(research_summaries),
         )
 
         try:
-            report = await self._chain.ainvoke({"topic": topic, "research": research})
+            report = await self._llm.ainvoke(messages)
         except Exception as e:
-            logger.error(f"[ReportWriterNode] Error during report generation: {e}")
+            logger.error("[ReportWriterNode] Error during report generation: %s", e)
             raise NodeError("Unable to generate report. Please try again") from e
 
         return {"report": report.content}
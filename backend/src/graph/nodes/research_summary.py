@@ -1,9 +1,11 @@
 import logging
 
 from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
 from langchain_core.prompts import ChatPromptTemplate
 
-from src.graph.nodes.base import BaseNode, NodeError
+from src.graph.documents import DocumentStore
+from src.graph.nodes.base import BaseNode, NodeError, run_sized
 from src.graph.states import ResearchSubGraphState
 
 logger = logging.getLogger(__name__)
@@ -56,32 +58,54 @@ class ResearchSummaryNode(BaseNode):
     Node responsible for generating a research summary based on query and search docs.
     """
 
-    def __init__(self, llm: BaseChatModel):
-        prompt = ChatPromptTemplate.from_messages(
+    def __init__(self, llm: BaseChatModel, offload_chars: int = 1_000_000):
+        """Initializes the node.
+
+        Args:
+            llm (BaseChatModel): The model writing the summary.
+            offload_chars (int): The size of the search docs, in characters, from
+                which the prompt is assembled in a thread.
+        """
+        self._prompt = ChatPromptTemplate.from_messages(
             [
                 ("system", _SYSTEM_MESSAGE),
                 ("user", _USER_MESSAGE),
             ],
         )
-        self._chain = prompt | llm
+        self._llm = llm
+        self._offload_chars = offload_chars
+
+    def _format_prompt(self, query: str, search_docs: list[str]) -> list[BaseMessage]:
+        return self._prompt.format_messages(
+            query=query, search_docs="\n-----\n".join(search_docs)
+        )
 
     async def _arun(self, state: ResearchSubGraphState) -> dict[str, list[str]]:
         query = state["query"]
-        search_docs = "\n-----\n".join(state["search_docs"])
+        documents = DocumentStore.from_config()
+        search_docs = documents.get(state["search_docs"])
+        messages = await run_sized(
+            sum(map(len, search_docs)),
+            self._offload_chars,
+            self._format_prompt,
+            query,
+            search_docs,
+        )
 
         logger.info(
-            f"[ResearchSummaryNode] Generating research summary for query: "
-            f"'{query}' with {len(state['search_docs'])} documents."
+            "[ResearchSummaryNode] Generating research summary for query: "
+            "'%s' with %d documents.",
+            query,
+            len(state["search_docs"]),
         )
 
         try:
-            research_summary = await self._chain.ainvoke(
-                {"query": query, "search_docs": search_docs}
-            )
+            research_summary = await self._llm.ainvoke(messages)
         except Exception as e:
             logger.error(
-                f"[ResearchSummaryNode] Error during research summary generation: {e}"
+                "[ResearchSummaryNode] Error during research summary generation: %s",
+                e,
             )
             raise NodeError("Unable to summarize findings. Please try again") from e
 
-        return {"summaries": [research_summary.content]}
+        return {"summaries": documents.put([research_summary.content])}
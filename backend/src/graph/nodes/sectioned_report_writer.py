@@ -0,0 +1,311 @@
+import asyncio
+import logging
+import re
+from urllib.parse import urlsplit
+
+from langchain_core.callbacks.manager import adispatch_custom_event
+from langchain_core.language_models import BaseChatModel
+from langchain_core.prompts import ChatPromptTemplate
+from pydantic import BaseModel, Field
+
+from src.graph.constants import EVENT_REPORT_CHUNK, TAG_REPORT_SECTION
+from src.graph.documents import DocumentStore
+from src.graph.nodes.base import BaseNode, NodeError
+from src.graph.states import ResearchGraphState
+
+logger = logging.getLogger(__name__)
+
+
+class OutlineSection(BaseModel):
+    """A body section of the report outline."""
+
+    heading: str = Field(description="Section heading, without markdown")
+    description: str = Field(
+        description="What the section covers, and which memos it draws on"
+    )
+
+
+class ReportOutline(BaseModel):
+    """Model for structured output containing the report outline."""
+
+    title: str = Field(description="Engaging report title, max 50 characters")
+    sections: list[OutlineSection] = Field(
+        description="Body sections, organized by themes across memos"
+    )
+
+
+_SYSTEM_MESSAGE = """You are an expert writer synthesizing comprehensive research reports.
+
+Your expertise includes:
+- Creating engaging, well-structured research reports
+- Synthesizing multiple research memos into cohesive narratives
+- Writing in academic style following APA format
+- Maintaining factual accuracy with proper source attribution
+
+You will receive a collection of research memos on subtopics/search queries about: {topic}
+
+Each memo:
+- Contains analysis of a specific subtopic/search query
+- Includes source citations in [n] format, numbered consistently across memos
+- Follows markdown formatting
+- Enclosed in <MEMO [n]></MEMO [n]>"""  # noqa: E501
+
+_OUTLINE_MESSAGE = """Plan the outline of a detailed research report on the research memos below.
+Give the report a title, and {min_sections} to {max_sections} body sections organized by themes/patterns across memos, in a logical order.
+Do not include the introduction, conclusion or sources in the sections.
+
+Research memos to analyze:
+{research}"""  # noqa: E501
+
+_SECTION_MESSAGE = """You are writing one part of the research report "{title}", while other writers write the other parts at the same time.
+
+Report outline:
+{outline}
+
+Write ONLY the {part}, starting with the header "{header}".
+{instructions}
+
+Guidelines:
+- Include specific facts, figures, and data points from the memos
+- Cite sources with the [n] numbers used in the memos
+- Use proper markdown, with ### subsection headers as needed
+- UNDERLINES (e.g., "----", "====") BELOW HEADERS OR SUBHEADERS ARE NOT PERMITTED
+- Do not write a sources list, it is added separately
+
+Research memos to analyze:
+{research}
+
+RETURN ONLY THE SECTION WITH NO ADDITIONAL COMMENTARY."""  # noqa: E501
+
+_INTRODUCTION = """About 100 words that present the topic's context and significance, preview the key findings and the report structure, and capture reader interest."""  # noqa: E501
+
+_BODY_SECTION = """About {words} words that cover: {description}
+Synthesize the relevant memos, focus on concrete findings and avoid generic conclusions."""  # noqa: E501
+
+_CONCLUSION = """About 100 words that summarize and highlight the key insights, and end with impactful closing thoughts."""  # noqa: E501
+
+_URL_PATTERN = re.compile(r"https?://[^\s<>()\[\]\"']+")
+_CITATION_PATTERN = re.compile(r"( ?)\[(\d+)\]")
+_SOURCES_HEADER = re.compile(r"^#+\s*Sources\s*$", re.MULTILINE | re.IGNORECASE)
+
+
+def _number_sources(memos: list[str]) -> tuple[list[str], list[str]]:
+    """Renumbers the citations of the memos consistently across memos.
+
+    Each memo numbers its sources on its own, in its "Sources" section. Sources
+    are numbered in order of first appearance across memos, and the citations
+    of each memo are rewritten to those numbers. Citations of sources a memo
+    does not list are dropped.
+
+    Returns:
+        tuple[list[str], list[str]]: The memos without their "Sources" sections,
+            and the source URLs, the source numbered [n] at index n - 1.
+    """
+    urls: dict[str, int] = {}
+    numbered_memos: list[str] = []
+    for memo in memos:
+        match = _SOURCES_HEADER.search(memo)
+        body, sources = (
+            (memo[: match.start()], memo[match.end() :]) if match else (memo, "")
+        )
+
+        local: dict[int, int] = {}
+        lines = [line for line in sources.splitlines() if _URL_PATTERN.search(line)]
+        for position, line in enumerate(lines, start=1):
+            url = _URL_PATTERN.search(line)[0].rstrip(".,;:")
+            citation = _CITATION_PATTERN.search(line)
+            number = int(citation[2]) if citation else position
+            local[number] = urls.setdefault(url, len(urls) + 1)
+
+        numbered_memos.append(
+            _CITATION_PATTERN.sub(
+                lambda m, local=local: (
+                    f"{m[1]}[{local[int(m[2])]}]" if int(m[2]) in local else ""
+                ),
+                body.rstrip(),
+            )
+        )
+    return numbered_memos, list(urls)
+
+
+def _format_sources(urls: list[str]) -> str:
+    """Formats the "Sources" section, as `[n] [domain](url)` lines."""
+    lines = []
+    for number, url in enumerate(urls, start=1):
+        host = urlsplit(url).hostname or url
+        domain = ".".join(host.removeprefix("www.").split(".")[-2:])
+        lines.append(f"- [{number}] [{domain}]({url})")
+    return "## Sources\n" + "\n".join(lines)
+
+
+class SectionedReportWriterNode(BaseNode):
+    """Node responsible for generating research reports section by section.
+
+    An outline is planned first. The introduction, every body section and the
+    conclusion are then written concurrently, and streamed in document order:
+    each section's text is held back until all earlier sections are complete.
+    The "Sources" section is built from the memos rather than generated. The
+    text is streamed as `EVENT_REPORT_CHUNK` custom events, and the model runs
+    are tagged `TAG_REPORT_SECTION`, as their raw chunks are out of order.
+    """
+
+    def __init__(
+        self,
+        llm: BaseChatModel,
+        outline_llm: BaseChatModel,
+        min_sections: int = 3,
+        max_sections: int = 5,
+        body_words: int = 1_200,
+    ):
+        """Initializes the node.
+
+        Args:
+            llm (BaseChatModel): The model writing the sections.
+            outline_llm (BaseChatModel): The model planning the outline, with
+                structured output.
+            min_sections (int): The minimum number of body sections.
+            max_sections (int): The maximum number of body sections.
+            body_words (int): The approximate length of all body sections.
+        """
+        outline_prompt = ChatPromptTemplate.from_messages(
+            [
+                ("system", _SYSTEM_MESSAGE),
+                ("user", _OUTLINE_MESSAGE),
+            ],
+        )
+        section_prompt = ChatPromptTemplate.from_messages(
+            [
+                ("system", _SYSTEM_MESSAGE),
+                ("user", _SECTION_MESSAGE),
+            ],
+        )
+        self._outline_chain = (
+            outline_prompt | outline_llm.with_structured_output(ReportOutline)
+        ).with_config(tags=[TAG_REPORT_SECTION])
+        self._section_chain = (section_prompt | llm).with_config(
+            tags=[TAG_REPORT_SECTION]
+        )
+        self._min_sections = min_sections
+        self._max_sections = max_sections
+        self._body_words = body_words
+
+    def _section_inputs(
+        self, topic: str, research: str, outline: ReportOutline
+    ) -> list[dict[str, str]]:
+        """Returns the prompt inputs of each section, in document order."""
+        headings = "\n".join(
+            f"{n}. {section.heading}: {section.description}"
+            for n, section in enumerate(outline.sections, start=1)
+        )
+        common = {
+            "topic": topic,
+            "research": research,
+            "title": outline.title,
+            "outline": f"Introduction\n{headings}\nConclusion",
+        }
+        words = max(self._body_words // max(len(outline.sections), 1), 150)
+        return [
+            {
+                **common,
+                "part": "introduction",
+                "header": "## Introduction",
+                "instructions": _INTRODUCTION,
+            },
+            *(
+                {
+                    **common,
+                    "part": f'body section "{section.heading}"',
+                    "header": f"## {section.heading}",
+                    "instructions": _BODY_SECTION.format(
+                        words=words, description=section.description
+                    ),
+                }
+                for section in outline.sections
+            ),
+            {
+                **common,
+                "part": "conclusion",
+                "header": "## Conclusion",
+                "instructions": _CONCLUSION,
+            },
+        ]
+
+    async def _write_section(
+        self, inputs: dict[str, str], queue: asyncio.Queue[str | None]
+    ) -> None:
+        """Writes a section, queueing its text as it is generated."""
+        try:
+            async for chunk in self._section_chain.astream(inputs):
+                if chunk.content:
+                    queue.put_nowait(chunk.content)
+        finally:
+            queue.put_nowait(None)
+
+    async def _emit(self, text: str, report: list[str]) -> None:
+        report.append(text)
+        await adispatch_custom_event(EVENT_REPORT_CHUNK, {"content": text})
+
+    async def _arun(self, state: ResearchGraphState) -> dict[str, str]:
+        topic = state["topic"]
+        memos, urls = _number_sources(
+            DocumentStore.from_config().get(state["summaries"])
+        )
+        research = "\n-----\n".join(
+            f"<MEMO [{idx}]>\n{memo}\n</MEMO [{idx}]>" for idx, memo in enumerate(memos)
+        )
+
+        logger.info(
+            "[SectionedReportWriterNode] Planning report for topic: '%s' with %d "
+            "summaries and %d sources.",
+            topic,
+            len(memos),
+            len(urls),
+        )
+        try:
+            outline: ReportOutline = await self._outline_chain.ainvoke(
+                {
+                    "topic": topic,
+                    "research": research,
+                    "min_sections": self._min_sections,
+                    "max_sections": self._max_sections,
+                }
+            )
+        except Exception as e:
+            logger.error(
+                "[SectionedReportWriterNode] Error during outline planning: %s", e
+            )
+            raise NodeError("Unable to generate report. Please try again") from e
+        outline.sections = outline.sections[: self._max_sections]
+
+        logger.info(
+            "[SectionedReportWriterNode] Writing %d sections for topic: '%s'.",
+            len(outline.sections) + 2,
+            topic,
+        )
+        report: list[str] = []
+        await self._emit(f"# {outline.title}\n\n", report)
+
+        sections = self._section_inputs(topic, research, outline)
+        queues: list[asyncio.Queue[str | None]] = [asyncio.Queue() for _ in sections]
+        tasks = [
+            asyncio.create_task(self._write_section(inputs, queue))
+            for inputs, queue in zip(sections, queues, strict=True)
+        ]
+        try:
+            for task, queue in zip(tasks, queues, strict=True):
+                while (text := await queue.get()) is not None:
+                    await self._emit(text, report)
+                # Raises the error of a failed section
+                await task
+                await self._emit("\n\n", report)
+        except Exception as e:
+            logger.error(
+                "[SectionedReportWriterNode] Error during report generation: %s", e
+            )
+            raise NodeError("Unable to generate report. Please try again") from e
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        await self._emit(_format_sources(urls), report)
+        return {"report": "".join(report)}
@@ -1,36 +1,49 @@
 import logging
 
-from langchain_community.tools import TavilySearchResults
-
-from src.config import settings
+from src.graph.adaptive import AdaptiveResearch
+from src.graph.documents import DocumentStore
 from src.graph.nodes.base import BaseNode, NodeError
 from src.graph.states import ResearchSubGraphState
+from src.search import SearchBackend
 
 logger = logging.getLogger(__name__)
 
 
 class WebSearchNode(BaseNode):
-    """Node responsible for performing a web search using TAVILY."""
+    """Node responsible for searching for a query with a search backend."""
 
-    def __init__(self):
-        self._search = TavilySearchResults(
-            search_depth=settings.TAVILY_SEARCH_DEPTH,
-            exclude_domains=settings.TAVILY_EXCLUDE_DOMAINS,
-        )
+    def __init__(self, search: SearchBackend):
+        self._search = search
 
     async def _arun(self, state: ResearchSubGraphState) -> dict[str, list[str]]:
         query = state["query"]
 
-        logger.info(f"[WebSearchNode] Performing web search for query: '{query}'.")
+        research = AdaptiveResearch.from_config()
+        if research is not None and not await research.start_search(query):
+            logger.info("[WebSearchNode] Skipping web search for query: '%s'.", query)
+            return {"search_docs": [], "summaries": []}
+
+        logger.info("[WebSearchNode] Performing web search for query: '%s'.", query)
 
         try:
-            search_results = await self._search.ainvoke(input=query)
+            search_results = await self._search.asearch(query)
             search_docs = [
                 f'<Document href="{result["url"]}"/>\n{result["content"]}\n</Document>'
                 for result in search_results
             ]
         except Exception as e:
-            logger.error(f"[WebSearchNode] Error during web search: {e}")
+            logger.error("[WebSearchNode] Error during web search: %s", e)
+            if research is not None:
+                await research.finish_search([])
             raise NodeError("Unable to perform web search. Please try again.") from e
 
-        return {"search_docs": search_docs}
+        if research is not None and not await research.finish_search(search_docs):
+            logger.info(
+                "[WebSearchNode] Skipping redundant results for query: '%s'.", query
+            )
+            return {"search_docs": [], "summaries": []}
+        # Searches without results skip the summary, so write it empty
+        return {
+            "search_docs": DocumentStore.from_config().put(search_docs),
+            "summaries": [],
+        }
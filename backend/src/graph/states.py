@@ -10,7 +10,8 @@ class ResearchGraphState(TypedDict):
     violated_category: str  # Category violated by the topic, if any
     query_count: int  # Number of queries to generate
     queries: list[str]  # List of search queries
-    summaries: Annotated[list[str], operator.add]  # Research summaries
+    # References to the research summaries in the run's document store
+    summaries: Annotated[list[str], operator.add]
     report: str  # Final research report
 
 
@@ -18,8 +19,8 @@ class ResearchSubGraphState(TypedDict):
     """Represents the state for the research subgraph."""
 
     query: str  # Search query
-    search_docs: list[str]  # Search results
-    summaries: list[str]  # Research summaries
+    search_docs: list[str]  # References to the search results
+    summaries: list[str]  # References to the research summaries
 
 
 # Type alias for convenience
@@ -0,0 +1,80 @@
+import logging
+import random
+import uuid
+from datetime import UTC, datetime
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class TraceSampler:
+    """Head-based sampler deciding, per run, whether to trace it to LangSmith.
+
+    Sampled runs are traced in full. Every other run is recorded as a single
+    root run without child runs, with the same run ID, inputs, outputs and
+    error. This keeps feedback on the run ID and errored runs visible in
+    LangSmith, without the per-node and per-chunk tracing overhead.
+    """
+
+    def __init__(self, enabled: bool, sample_rate: float, project_name: str):
+        """Initializes the sampler.
+
+        Args:
+            enabled (bool): Whether LangSmith tracing is enabled at all.
+            sample_rate (float): The fraction of runs to trace in full.
+            project_name (str): The LangSmith project of the root-only runs.
+        """
+        self.enabled = enabled
+        self._sample_rate = sample_rate
+        self._project_name = project_name
+
+    def sample(self, force: bool = False) -> bool:
+        """Decides whether to trace a run in full.
+
+        Args:
+            force (bool): Whether the run is flagged for tracing.
+
+        Returns:
+            bool: True if the run should be traced in full.
+        """
+        return self.enabled and (force or random.random() < self._sample_rate)
+
+    def record_run(
+        self,
+        name: str,
+        run_id: str | None,
+        start_time: datetime,
+        inputs: dict[str, Any],
+        outputs: dict[str, Any] | None = None,
+        error: str | None = None,
+    ) -> None:
+        """Records an unsampled run as a single root run, in the background.
+
+        Args:
+            name (str): The run name.
+            run_id (str | None): The run ID, or None to generate one.
+            start_time (datetime): The start time of the run.
+            inputs (dict[str, Any]): The run inputs.
+            outputs (dict[str, Any] | None): The run outputs, if it completed.
+            error (str | None): The error, if it failed.
+        """
+        if not self.enabled:
+            return
+
+        # Imported here, as it is only needed when tracing is enabled.
+        from langsmith.run_trees import RunTree
+
+        try:
+            run = RunTree(
+                id=uuid.UUID(run_id) if run_id else uuid.uuid4(),
+                name=name,
+                run_type="chain",
+                inputs=inputs,
+                start_time=start_time,
+                project_name=self._project_name,
+                extra={"metadata": {"sampled": False}},
+            )
+            run.end(outputs=outputs, error=error, end_time=datetime.now(UTC))
+            run.post()
+        except Exception as e:
+            logger.error("[TraceSampler] Error while recording run: %s", e)
@@ -0,0 +1,275 @@
+import time
+from dataclasses import dataclass, field
+from typing import Any, Literal
+from uuid import UUID, uuid4
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from src.graph.constants import EVENT_LLM_USAGE
+
+
+@dataclass
+class _Run:
+    """A traced chain, chat model or tool run."""
+
+    name: str
+    kind: Literal["chain", "llm", "tool"]
+    parent: "_Run | None"
+    node: str | None  # The graph node the run belongs to
+    start: float
+    end: float | None = None
+    branch: str | None = None  # The query of the research branch
+    model: str | None = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+    children: list["_Run"] = field(default_factory=list)
+
+    @property
+    def is_node(self) -> bool:
+        # Excludes LangGraph's internal nodes, such as `__start__`
+        return (
+            self.kind == "chain"
+            and self.name == self.node
+            and not self.name.startswith("__")
+        )
+
+    @property
+    def wall_ms(self) -> float:
+        return ((self.end or time.perf_counter()) - self.start) * 1000
+
+
+def _totals() -> dict[str, Any]:
+    return {
+        "calls": 0,
+        "wall_ms": 0.0,
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "cost_usd": 0.0,
+    }
+
+
+class RunUsageCollector(BaseCallbackHandler):
+    """Callback handler collecting the token usage and wall time of a graph run.
+
+    LLM and tool calls are grouped by graph node and by research branch, where a
+    branch is the research of a single query. The critical path is the chain of
+    graph nodes that determined the run's wall time, found by walking back from
+    the end of the run through the last runs to finish. Usage reported with
+    `EVENT_LLM_USAGE` custom events, such as a run's share of a batched call,
+    counts as an LLM call of the node that reported it.
+    """
+
+    # Called on the event loop, collecting is cheap enough not to need a thread.
+    run_inline = True
+
+    def __init__(self, prices: dict[str, tuple[float, float]]):
+        """Initializes the collector.
+
+        Args:
+            prices (dict[str, tuple[float, float]]): USD per million input and
+                output tokens, by model name. Unpriced models cost nothing.
+        """
+        self._prices = prices
+        self._runs: dict[UUID, _Run] = {}
+        self._root: _Run | None = None
+
+    def _start(
+        self,
+        run_id: UUID,
+        parent_run_id: UUID | None,
+        name: str,
+        kind: Literal["chain", "llm", "tool"],
+        metadata: dict[str, Any] | None,
+    ) -> _Run:
+        parent = self._runs.get(parent_run_id) if parent_run_id else None
+        run = _Run(
+            name=name,
+            kind=kind,
+            parent=parent,
+            node=(metadata or {}).get("langgraph_node"),
+            start=time.perf_counter(),
+            branch=parent.branch if parent else None,
+        )
+        self._runs[run_id] = run
+        if parent is not None:
+            parent.children.append(run)
+        elif self._root is None:
+            self._root = run
+        return run
+
+    def _end(self, run_id: UUID) -> _Run | None:
+        if run := self._runs.get(run_id):
+            run.end = time.perf_counter()
+        return run
+
+    def on_chain_start(
+        self,
+        serialized: dict[str, Any],
+        inputs: dict[str, Any],
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        name = kwargs.get("name") or (serialized or {}).get("name", "")
+        run = self._start(run_id, parent_run_id, name, "chain", metadata)
+        # The outermost run invoked with a query starts a research branch
+        if run.branch is None and isinstance(inputs, dict) and "query" in inputs:
+            run.branch = inputs["query"]
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: list[list[Any]],
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        name = kwargs.get("name") or (serialized or {}).get("name", "")
+        run = self._start(run_id, parent_run_id, name, "llm", metadata)
+        run.model = (metadata or {}).get("ls_model_name")
+
+    def on_tool_start(
+        self,
+        serialized: dict[str, Any],
+        input_str: str,
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        name = kwargs.get("name") or (serialized or {}).get("name", "")
+        self._start(run_id, parent_run_id, name, "tool", metadata)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        if (run := self._end(run_id)) is None:
+            return
+        for generations in response.generations:
+            for generation in generations:
+                if not isinstance(generation, ChatGeneration):
+                    continue
+                message = generation.message
+                if usage := getattr(message, "usage_metadata", None):
+                    run.input_tokens += usage["input_tokens"]
+                    run.output_tokens += usage["output_tokens"]
+                run.model = message.response_metadata.get("model_name") or run.model
+
+    def on_custom_event(
+        self,
+        name: str,
+        data: Any,
+        *,
+        run_id: UUID,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        if name != EVENT_LLM_USAGE:
+            return
+        run = self._start(uuid4(), run_id, name, "llm", metadata)
+        run.end = run.start
+        run.model = data["model"]
+        run.input_tokens = data["input_tokens"]
+        run.output_tokens = data["output_tokens"]
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_llm_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._end(run_id)
+
+    def on_chain_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._end(run_id)
+
+    def on_tool_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._end(run_id)
+
+    def _cost(self, run: _Run) -> float:
+        model = (run.model or "").removeprefix("models/")
+        input_price, output_price = self._prices.get(model, (0.0, 0.0))
+        return (run.input_tokens * input_price + run.output_tokens * output_price) / 1e6
+
+    def _critical_path(self, run: _Run) -> list[_Run]:
+        """Returns the innermost node runs on the critical path of the run."""
+        path: list[_Run] = []
+        children = [child for child in run.children if child.end is not None]
+        cursor = run.end or time.perf_counter()
+        while candidates := [child for child in children if child.end <= cursor]:
+            last = max(candidates, key=lambda child: child.end)
+            path[:0] = self._critical_path(last)
+            cursor = last.start
+            children = [child for child in candidates if child is not last]
+        if not path and run.is_node:
+            return [run]
+        return path
+
+    def summary(self) -> dict[str, Any]:
+        """Returns the usage summary of the run.
+
+        Returns:
+            dict[str, Any]: Run totals, LLM and tool calls grouped by node and by
+                research branch, and the critical path.
+        """
+        if self._root is None:
+            return {}
+
+        totals = _totals()
+        nodes: dict[str, dict[str, Any]] = {}
+        branches: dict[str, dict[str, Any]] = {}
+        for run in self._runs.values():
+            if run.is_node:
+                nodes.setdefault(run.node, _totals())["wall_ms"] += run.wall_ms
+            if run.branch is not None and (
+                run.parent is None or run.parent.branch is None
+            ):
+                branches.setdefault(run.branch, _totals())["wall_ms"] += run.wall_ms
+            if run.kind == "chain":
+                continue
+
+            cost = self._cost(run)
+            groups = [totals, nodes.setdefault(run.node or run.name, _totals())]
+            if run.branch is not None:
+                groups.append(branches.setdefault(run.branch, _totals()))
+            for group in groups:
+                group["calls"] += 1
+                group["input_tokens"] += run.input_tokens
+                group["output_tokens"] += run.output_tokens
+                group["cost_usd"] += cost
+        totals["wall_ms"] = self._root.wall_ms
+
+        def _round(group: dict[str, Any]) -> dict[str, Any]:
+            return {
+                **group,
+                "wall_ms": round(group["wall_ms"], 1),
+                "cost_usd": round(group["cost_usd"], 6),
+            }
+
+        return {
+            **_round(totals),
+            "nodes": {node: _round(group) for node, group in nodes.items()},
+            "branches": [
+                {"query": query, **_round(group)} for query, group in branches.items()
+            ],
+            "critical_path": [
+                {
+                    "node": run.node,
+                    "query": run.branch,
+                    "start_ms": round((run.start - self._root.start) * 1000, 1),
+                    "wall_ms": round(run.wall_ms, 1),
+                }
+                for run in self._critical_path(self._root)
+            ],
+        }
@@ -0,0 +1,6 @@
+from .store import ReportStore, StoredReport
+
+__all__ = [
+    "ReportStore",
+    "StoredReport",
+]
@@ -0,0 +1,112 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import brotli
+
+logger = logging.getLogger(__name__)
+
+# Content codings runs are stored in, preferred first
+_SUFFIXES = {"br": ".json.br", "gzip": ".json.gz"}
+
+
+@dataclass
+class StoredReport:
+    """A completed research run, as kept in the report store."""
+
+    run_id: str
+    topic: str
+    queries: list[str]
+    summaries: list[str]
+    report: str
+    created_at: str  # ISO 8601 completion time
+
+
+class ReportStore:
+    """On-disk store of completed research runs, compressed.
+
+    Runs are written once and never change, so each is compressed once, at the
+    highest compression level, into one file per content coding: brotli and
+    gzip. Reads return a file as stored, so compressed responses need no work
+    beyond reading it. Runs stored by versions that made brotli optional may
+    only have the gzip file.
+    """
+
+    def __init__(self, path: Path):
+        """Initializes the store.
+
+        Args:
+            path (Path): The store directory, created if missing.
+        """
+        self._path = path
+        self._path.mkdir(parents=True, exist_ok=True)
+
+    def _file(self, run_id: str, encoding: str) -> Path:
+        return self._path / f"{run_id}{_SUFFIXES[encoding]}"
+
+    def stored_encodings(self, run_id: str) -> tuple[str, ...]:
+        """Returns the content codings a run is stored in, without reading it.
+
+        Args:
+            run_id (str): The run ID.
+
+        Returns:
+            tuple[str, ...]: The content codings, preferred first, or an empty
+                tuple if the run is not stored.
+        """
+        # The gzip file is written last, so the run is complete once it exists.
+        if not self._file(run_id, "gzip").exists():
+            return ()
+        return tuple(
+            encoding
+            for encoding in _SUFFIXES
+            if encoding == "gzip" or self._file(run_id, encoding).exists()
+        )
+
+    async def save(self, run: StoredReport) -> None:
+        """Compresses and stores a completed run.
+
+        Args:
+            run (StoredReport): The completed run.
+        """
+        # Compression at the highest levels takes milliseconds, off the loop.
+        await asyncio.to_thread(self._write, run)
+        logger.info("[ReportStore] Stored report of run '%s'.", run.run_id)
+
+    def _write(self, run: StoredReport) -> None:
+        data = json.dumps(asdict(run)).encode()
+        compressed = {
+            "br": brotli.compress(data, quality=11),
+            "gzip": gzip.compress(data, compresslevel=9, mtime=0),
+        }
+
+        for encoding in sorted(compressed, key=lambda e: e == "gzip"):
+            file = self._file(run.run_id, encoding)
+            tmp_file = file.with_name(file.name + ".tmp")
+            tmp_file.write_bytes(compressed[encoding])
+            os.replace(tmp_file, file)
+
+    async def read(self, run_id: str, encoding: str) -> bytes:
+        """Reads a stored run as JSON.
+
+        Args:
+            run_id (str): The run ID.
+            encoding (str): The content coding of the returned JSON, one of
+                the run's `stored_encodings` or "identity".
+
+        Returns:
+            bytes: The JSON of the run, in the given content coding.
+
+        Raises:
+            FileNotFoundError: If the run is not stored.
+        """
+        if encoding == "identity":
+            return await asyncio.to_thread(self._read_identity, run_id)
+        return await asyncio.to_thread(self._file(run_id, encoding).read_bytes)
+
+    def _read_identity(self, run_id: str) -> bytes:
+        return gzip.decompress(self._file(run_id, "gzip").read_bytes())
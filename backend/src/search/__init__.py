@@ -0,0 +1,45 @@
+from pathlib import Path
+from typing import Literal
+
+from src.config import settings
+
+from .base import SearchBackend, SearchResult
+
+
+def get_search_backend(backend: Literal["tavily", "local"]) -> SearchBackend:
+    """Returns the search backend configured in the settings.
+
+    Args:
+        backend (Literal["tavily", "local"]): The backend to use.
+
+    Returns:
+        SearchBackend: The search backend instance.
+
+    Raises:
+        ValueError: If the backend is not recognized.
+    """
+    # Backends are imported on use, as their dependencies are slow to import.
+    match backend:
+        case "tavily":
+            from .tavily import TavilySearchBackend
+
+            return TavilySearchBackend(
+                search_depth=settings.TAVILY_SEARCH_DEPTH,
+                exclude_domains=settings.TAVILY_EXCLUDE_DOMAINS,
+            )
+        case "local":
+            from .bm25 import LocalSearchBackend
+
+            return LocalSearchBackend(
+                index_path=Path(settings.LOCAL_SEARCH_INDEX_PATH),
+                max_results=settings.LOCAL_SEARCH_MAX_RESULTS,
+            )
+        case _:
+            raise ValueError(f"Unknown search backend: {backend}")
+
+
+__all__ = [
+    "SearchBackend",
+    "SearchResult",
+    "get_search_backend",
+]
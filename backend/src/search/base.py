@@ -0,0 +1,25 @@
+from abc import ABC, abstractmethod
+from typing import TypedDict
+
+
+class SearchResult(TypedDict):
+    """A single search result."""
+
+    url: str  # Source URL, or the corpus path of local documents
+    content: str  # Relevant content of the source
+
+
+class SearchBackend(ABC):
+    """Abstract base class for search backends used by the research graph."""
+
+    @abstractmethod
+    async def asearch(self, query: str) -> list[SearchResult]:
+        """Searches for documents relevant to the query.
+
+        Args:
+            query (str): The search query.
+
+        Returns:
+            list[SearchResult]: The results, most relevant first.
+        """
+        pass
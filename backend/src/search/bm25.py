@@ -0,0 +1,242 @@
+import asyncio
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from src.search.base import SearchBackend, SearchResult
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+_STOPWORDS = frozenset(
+    {
+        "a",
+        "an",
+        "and",
+        "are",
+        "as",
+        "at",
+        "be",
+        "by",
+        "for",
+        "from",
+        "in",
+        "is",
+        "it",
+        "of",
+        "on",
+        "or",
+        "that",
+        "the",
+        "to",
+        "was",
+        "with",
+    }
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Splits text into lowercase terms, without stopwords."""
+    return [
+        token
+        for token in _TOKEN_PATTERN.findall(text.lower())
+        if token not in _STOPWORDS
+    ]
+
+
+def term_hash(term: str) -> int:
+    """Returns the 64-bit hash a term is stored under in the index."""
+    return int.from_bytes(hashlib.blake2b(term.encode(), digest_size=8).digest())
+
+
+def read_manifest(path: Path) -> dict:
+    """Returns the manifest of the index at `path`, empty if there is none."""
+    manifest_path = path / MANIFEST_FILE
+    if not manifest_path.exists():
+        return {"segments": [], "next_segment": 0}
+    return json.loads(manifest_path.read_text())
+
+
+class Segment:
+    """An immutable, memory-mapped segment of the index.
+
+    A segment directory holds sorted term hashes (`terms.npy`), the offsets of
+    each term's postings (`offsets.npy`), the postings' document IDs and term
+    frequencies (`postings_docs.npy`, `postings_tfs.npy`), document lengths
+    (`doc_lengths.npy`), and the documents themselves as "url\\ncontent"
+    records (`docs.bin`, indexed by `doc_offsets.npy`). Only the deletion mask
+    (`deleted.npy`) is ever rewritten, when documents are replaced.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.terms = np.load(path / "terms.npy", mmap_mode="r")
+        self.offsets = np.load(path / "offsets.npy", mmap_mode="r")
+        self.postings_docs = np.load(path / "postings_docs.npy", mmap_mode="r")
+        self.postings_tfs = np.load(path / "postings_tfs.npy", mmap_mode="r")
+        self.doc_lengths = np.load(path / "doc_lengths.npy", mmap_mode="r")
+        self.doc_offsets = np.load(path / "doc_offsets.npy", mmap_mode="r")
+        self.deleted = np.load(path / "deleted.npy")
+        with open(path / "docs.bin", "rb") as docs:
+            self._docs = mmap.mmap(docs.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def postings(self, term: int) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the document IDs and term frequencies of a term hash."""
+        idx = int(np.searchsorted(self.terms, np.uint64(term)))
+        if idx == len(self.terms) or int(self.terms[idx]) != term:
+            return self.postings_docs[:0], self.postings_tfs[:0]
+        start, end = int(self.offsets[idx]), int(self.offsets[idx + 1])
+        return self.postings_docs[start:end], self.postings_tfs[start:end]
+
+    def document(self, doc: int) -> SearchResult:
+        """Returns a document of the segment."""
+        start, end = int(self.doc_offsets[doc]), int(self.doc_offsets[doc + 1])
+        url, _, content = self._docs[start:end].decode().partition("\n")
+        return SearchResult(url=url, content=content)
+
+
+class BM25Index:
+    """Read-only view of an on-disk BM25 index, built with `src.search.index`.
+
+    Postings are memory-mapped, so only the pages touched by queries are
+    resident. The index is reloaded whenever its manifest changes, so indexing
+    can run alongside searches. Document frequencies include documents that
+    were replaced but are not merged away yet.
+    """
+
+    def __init__(self, path: Path, k1: float = 1.2, b: float = 0.75):
+        """Initializes the index.
+
+        Args:
+            path (Path): The index directory.
+            k1 (float): The BM25 term frequency saturation.
+            b (float): The BM25 document length normalization.
+        """
+        self._path = path
+        self._k1 = k1
+        self._b = b
+        self._lock = threading.Lock()
+        self._manifest_mtime: int | None = None
+        # Segments, live document count and average document length
+        self._state: tuple[list[Segment], int, float] = ([], 0, 0.0)
+
+    def _reload(self) -> None:
+        """Loads the segments of the current manifest, if it changed."""
+        try:
+            mtime = os.stat(self._path / MANIFEST_FILE).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        with self._lock:
+            if mtime == self._manifest_mtime:
+                return
+
+            segments = [
+                Segment(self._path / name)
+                for name in read_manifest(self._path)["segments"]
+            ]
+            live_lengths = [
+                segment.doc_lengths[~segment.deleted] for segment in segments
+            ]
+            doc_count = sum(len(lengths) for lengths in live_lengths)
+            total_length = sum(float(lengths.sum()) for lengths in live_lengths)
+            self._state = (segments, doc_count, total_length / max(doc_count, 1))
+            self._manifest_mtime = mtime
+        logger.info(
+            "[BM25Index] Loaded %d segments with %d documents.",
+            len(segments),
+            doc_count,
+        )
+
+    def search(self, query: str, k: int) -> list[tuple[float, SearchResult]]:
+        """Returns the `k` best scoring documents for the query.
+
+        Args:
+            query (str): The search query.
+            k (int): The maximum number of results.
+
+        Returns:
+            list[tuple[float, SearchResult]]: Scores and documents, best first.
+        """
+        self._reload()
+        segments, doc_count, avg_length = self._state
+        terms = list(dict.fromkeys(term_hash(t) for t in tokenize(query)))
+        if not terms or not doc_count:
+            return []
+
+        postings = [[segment.postings(term) for term in terms] for segment in segments]
+        dfs = np.array(
+            [
+                sum(len(segment_postings[i][0]) for segment_postings in postings)
+                for i in range(len(terms))
+            ],
+            dtype=np.float32,
+        )
+        idfs = np.log(1 + (doc_count - dfs + 0.5) / (dfs + 0.5))
+
+        candidates: list[tuple[float, int, int]] = []
+        for seg_idx, (segment, segment_postings) in enumerate(
+            zip(segments, postings, strict=True)
+        ):
+            docs, scores = self._score(segment, segment_postings, idfs, avg_length)
+            top = (
+                np.argpartition(-scores, k)[:k] if len(scores) > k else range(len(docs))
+            )
+            candidates.extend(
+                (float(scores[i]), seg_idx, int(docs[i])) for i in top if scores[i] > 0
+            )
+
+        candidates.sort(reverse=True)
+        return [
+            (score, segments[seg_idx].document(doc))
+            for score, seg_idx, doc in candidates[:k]
+        ]
+
+    def _score(
+        self,
+        segment: Segment,
+        postings: list[tuple[np.ndarray, np.ndarray]],
+        idfs: np.ndarray,
+        avg_length: float,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the segment's matching documents and their BM25 scores.
+        Deleted documents score zero."""
+        docs = np.concatenate([docs for docs, _ in postings])
+        tfs = np.concatenate([tfs for _, tfs in postings]).astype(np.float32)
+        term_idfs = np.repeat(idfs, [len(docs) for docs, _ in postings])
+
+        norms = self._k1 * (
+            1 - self._b + self._b * segment.doc_lengths[docs] / avg_length
+        )
+        contributions = term_idfs * tfs * (self._k1 + 1) / (tfs + norms)
+
+        unique_docs, inverse = np.unique(docs, return_inverse=True)
+        scores = np.bincount(inverse, weights=contributions, minlength=len(unique_docs))
+        scores[segment.deleted[unique_docs]] = 0.0
+        return unique_docs, scores
+
+
+class LocalSearchBackend(SearchBackend):
+    """Search backend searching a local document corpus with a BM25 index,
+    without any network calls."""
+
+    def __init__(self, index_path: Path, max_results: int = 5):
+        self._index = BM25Index(index_path)
+        self._max_results = max_results
+
+    async def asearch(self, query: str) -> list[SearchResult]:
+        # Scoring is CPU-bound and may fault in index pages, so it runs off the
+        # event loop.
+        results = await asyncio.to_thread(self._index.search, query, self._max_results)
+        return [result for _, result in results]
@@ -0,0 +1,290 @@
+"""Incrementally indexes a local document corpus for the local search backend.
+
+Only files added, changed or removed since the last run are (re)indexed, into a
+new index segment. Segments are merged once there are more than
+`--max-segments` of them. Usage:
+    python -m src.search.index CORPUS_DIR [--index PATH] [--merge]
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from src.config import settings
+from src.search.bm25 import (
+    MANIFEST_FILE,
+    Segment,
+    read_manifest,
+    term_hash,
+    tokenize,
+)
+
+logger = logging.getLogger(__name__)
+
+SOURCES_FILE = "sources.json"
+CORPUS_SUFFIXES = frozenset({".md", ".rst", ".txt"})
+
+
+def _write_json(path: Path, data: Any) -> None:
+    """Atomically replaces a JSON file."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(data))
+    os.replace(tmp_path, path)
+
+
+def _write_array(path: Path, array: np.ndarray) -> None:
+    """Atomically replaces a NumPy array file."""
+    tmp_path = path.with_name(path.name + ".tmp.npy")
+    np.save(tmp_path, array)
+    os.replace(tmp_path, path)
+
+
+def chunk_text(text: str, chunk_words: int) -> list[str]:
+    """Splits text into passages of about `chunk_words` words, at paragraph
+    boundaries where possible."""
+    chunks: list[str] = []
+    words: list[str] = []
+    for paragraph in text.split("\n\n"):
+        paragraph_words = paragraph.split()
+        while len(words) + len(paragraph_words) > chunk_words and (
+            words or len(paragraph_words) > chunk_words
+        ):
+            if words:
+                chunks.append(" ".join(words))
+                words = []
+            else:
+                chunks.append(" ".join(paragraph_words[:chunk_words]))
+                paragraph_words = paragraph_words[chunk_words:]
+        words.extend(paragraph_words)
+    if words:
+        chunks.append(" ".join(words))
+    return chunks
+
+
+class _SegmentBuilder:
+    """Builds a new index segment in memory."""
+
+    def __init__(self):
+        self._postings: defaultdict[int, tuple[list[int], list[int]]] = defaultdict(
+            lambda: ([], [])
+        )
+        self._doc_lengths: list[int] = []
+        self._docs: list[bytes] = []
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, url: str, content: str) -> int:
+        """Adds a document, returning its ID in the segment."""
+        doc = len(self._docs)
+        tokens = tokenize(content)
+        for term, tf in Counter(tokens).items():
+            docs, tfs = self._postings[term_hash(term)]
+            docs.append(doc)
+            tfs.append(tf)
+        self._doc_lengths.append(len(tokens))
+        self._docs.append(f"{url}\n{content}".encode())
+        return doc
+
+    def write(self, path: Path) -> None:
+        """Writes the segment files to a new directory."""
+        path.mkdir(parents=True)
+        terms = np.array(sorted(self._postings), dtype=np.uint64)
+        lengths = [len(self._postings[int(term)][0]) for term in terms]
+        np.save(path / "terms.npy", terms)
+        np.save(path / "offsets.npy", np.cumsum([0, *lengths], dtype=np.int64))
+        np.save(
+            path / "postings_docs.npy",
+            np.fromiter(
+                (d for term in terms for d in self._postings[int(term)][0]),
+                dtype=np.int32,
+                count=sum(lengths),
+            ),
+        )
+        np.save(
+            path / "postings_tfs.npy",
+            np.fromiter(
+                (tf for term in terms for tf in self._postings[int(term)][1]),
+                dtype=np.int32,
+                count=sum(lengths),
+            ),
+        )
+        np.save(path / "doc_lengths.npy", np.array(self._doc_lengths, dtype=np.int32))
+        np.save(
+            path / "doc_offsets.npy",
+            np.cumsum([0, *map(len, self._docs)], dtype=np.int64),
+        )
+        np.save(path / "deleted.npy", np.zeros(len(self._docs), dtype=bool))
+        with open(path / "docs.bin", "wb") as docs:
+            docs.writelines(self._docs)
+
+
+class IndexWriter:
+    """Incrementally maintains the on-disk BM25 index of a document corpus.
+
+    Every indexed file is recorded in `sources.json` with its size, modification
+    time and the range of its passages in a segment. Changed and removed files
+    have their passages marked deleted; new and changed files are indexed into a
+    new segment. The manifest is replaced last, so searches only ever see
+    complete index states.
+    """
+
+    def __init__(self, path: Path, chunk_words: int = 200, max_segments: int = 8):
+        """Initializes the writer.
+
+        Args:
+            path (Path): The index directory, created if missing.
+            chunk_words (int): The approximate number of words per passage.
+            max_segments (int): The number of segments above which all
+                segments are merged into one.
+        """
+        self._path = path
+        self._chunk_words = chunk_words
+        self._max_segments = max_segments
+
+    def _new_segment_name(self, manifest: dict) -> str:
+        name = f"segment-{manifest['next_segment']:06d}"
+        manifest["next_segment"] += 1
+        return name
+
+    def _delete(self, deleted: dict[str, np.ndarray], source: dict) -> None:
+        """Marks the passages of a source deleted in its segment's mask."""
+        segment = source["segment"]
+        if segment not in deleted:
+            deleted[segment] = np.load(self._path / segment / "deleted.npy")
+        deleted[segment][source["start"] : source["end"]] = True
+
+    def _add(
+        self, builder: _SegmentBuilder, segment_name: str, name: str, file: Path
+    ) -> dict:
+        """Adds the passages of a file to the builder, returning its source."""
+        stat = file.stat()
+        start = len(builder)
+        for chunk in chunk_text(file.read_text(errors="replace"), self._chunk_words):
+            builder.add(name, chunk)
+        return {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "segment": segment_name,
+            "start": start,
+            "end": len(builder),
+        }
+
+    def update(self, corpus: Path, merge: bool = False) -> dict[str, int]:
+        """Indexes the changes of the corpus since the last update.
+
+        Args:
+            corpus (Path): The corpus directory.
+            merge (bool): Whether to merge all segments into one.
+
+        Returns:
+            dict[str, int]: The number of added, updated and removed files, and
+                the number of segments.
+        """
+        self._path.mkdir(parents=True, exist_ok=True)
+        manifest = read_manifest(self._path)
+        sources_path = self._path / SOURCES_FILE
+        sources: dict[str, dict] = (
+            json.loads(sources_path.read_text()) if sources_path.exists() else {}
+        )
+        deleted: dict[str, np.ndarray] = {}  # Modified deletion masks by segment
+
+        files = {
+            file.relative_to(corpus).as_posix(): file
+            for file in sorted(corpus.rglob("*"))
+            if file.is_file() and file.suffix.lower() in CORPUS_SUFFIXES
+        }
+        stats = {"added": 0, "updated": 0, "removed": 0}
+        for name in [name for name in sources if name not in files]:
+            self._delete(deleted, sources.pop(name))
+            stats["removed"] += 1
+
+        builder = _SegmentBuilder()
+        segment_name = self._new_segment_name(manifest)
+        for name, file in files.items():
+            stat = file.stat()
+            if source := sources.get(name):
+                if (source["size"], source["mtime_ns"]) == (
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                ):
+                    continue
+                self._delete(deleted, source)
+            stats["updated" if source else "added"] += 1
+            sources[name] = self._add(builder, segment_name, name, file)
+
+        if len(builder):
+            builder.write(self._path / segment_name)
+            manifest["segments"].append(segment_name)
+        for segment, mask in deleted.items():
+            _write_array(self._path / segment / "deleted.npy", mask)
+        _write_json(sources_path, sources)
+        _write_json(self._path / MANIFEST_FILE, manifest)
+
+        if merge or len(manifest["segments"]) > self._max_segments:
+            self._merge(manifest, sources)
+        stats["segments"] = len(manifest["segments"])
+        return stats
+
+    def _merge(self, manifest: dict, sources: dict[str, dict]) -> None:
+        """Merges the live passages of all segments into a single segment."""
+        segments = {name: Segment(self._path / name) for name in manifest["segments"]}
+        builder = _SegmentBuilder()
+        segment_name = self._new_segment_name(manifest)
+        for source in sources.values():
+            segment = segments[source["segment"]]
+            start = len(builder)
+            for doc in range(source["start"], source["end"]):
+                result = segment.document(doc)
+                builder.add(result["url"], result["content"])
+            source.update(segment=segment_name, start=start, end=len(builder))
+
+        old_segments = manifest["segments"]
+        manifest["segments"] = []
+        if len(builder):
+            builder.write(self._path / segment_name)
+            manifest["segments"].append(segment_name)
+        _write_json(self._path / SOURCES_FILE, sources)
+        _write_json(self._path / MANIFEST_FILE, manifest)
+
+        # Open searches keep reading their memory maps of the removed files.
+        for name in old_segments:
+            shutil.rmtree(self._path / name)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("corpus", type=Path, help="The corpus directory.")
+    parser.add_argument(
+        "--index", type=Path, default=Path(settings.LOCAL_SEARCH_INDEX_PATH)
+    )
+    parser.add_argument("--chunk-words", type=int, default=200)
+    parser.add_argument("--max-segments", type=int, default=8)
+    parser.add_argument("--merge", action="store_true", help="Merge all segments.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    writer = IndexWriter(
+        args.index, chunk_words=args.chunk_words, max_segments=args.max_segments
+    )
+    stats = writer.update(args.corpus, merge=args.merge)
+    logger.info(
+        "[IndexWriter] Added %d, updated %d and removed %d files, %d segments.",
+        stats["added"],
+        stats["updated"],
+        stats["removed"],
+        stats["segments"],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+from src.search.base import SearchBackend, SearchResult
+
+
+class TavilySearchBackend(SearchBackend):
+    """Search backend performing web searches using TAVILY."""
+
+    def __init__(self, search_depth: str, exclude_domains: list[str]):
+        # Imported here, as importing `langchain_community` is slow.
+        from langchain_community.tools import TavilySearchResults
+
+        self._search = TavilySearchResults(
+            search_depth=search_depth,
+            exclude_domains=exclude_domains,
+        )
+
+    async def asearch(self, query: str) -> list[SearchResult]:
+        results = await self._search.ainvoke(input=query)
+        return [
+            SearchResult(url=result["url"], content=result["content"])
+            for result in results
+        ]
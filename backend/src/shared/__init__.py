@@ -0,0 +1,5 @@
+from .state import SharedState
+
+__all__ = [
+    "SharedState",
+]
@@ -0,0 +1,264 @@
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_limits (
+    key TEXT NOT NULL,
+    timestamp REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS rate_limits_key ON rate_limits (key, timestamp);
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id TEXT PRIMARY KEY,
+    heartbeat REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    request_id TEXT PRIMARY KEY,
+    topic TEXT NOT NULL,
+    worker_id TEXT NOT NULL,
+    started_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    worker_id TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+"""
+
+
+class SharedState:
+    """State shared by the worker processes of a host: rate-limit counters,
+    in-flight runs and completed run results.
+
+    The state lives in a SQLite database in WAL mode, so readers never block
+    the single writer, and every worker opens its own connection to it. Calls
+    run in a thread, as writes may wait for another worker's transaction.
+    Each worker holds a lease, renewed by a heartbeat every third of
+    `lease` seconds. Once a lease expires, the worker is presumed dead,
+    whether its process exited, hung or runs on another host sharing the
+    database, and its in-flight runs are dropped.
+    """
+
+    def __init__(self, path: Path, max_results: int = 10_000, lease: float = 30.0):
+        """Opens the shared state, creating the database if missing.
+
+        Args:
+            path (Path): The database file.
+            max_results (int): The number of most recent run results kept.
+            lease (float): The seconds a worker is presumed alive after its
+                last heartbeat.
+        """
+        self._max_results = max_results
+        self._lease = lease
+        # Unique across restarts, as process IDs are reused
+        self.worker_id = f"{os.getpid()}-{secrets.token_hex(4)}"
+        self._lock = threading.Lock()
+        self._heartbeat_task: asyncio.Task | None = None
+        # Transactions are managed explicitly, see `_transaction`.
+        self._conn = sqlite3.connect(
+            path, timeout=10.0, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL commits are durable across process crashes without a sync
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    async def start(self) -> None:
+        """Takes this worker's lease and starts renewing it."""
+        await asyncio.to_thread(self._heartbeat)
+        self._heartbeat_task = asyncio.create_task(self._run_heartbeat())
+
+    async def stop(self) -> None:
+        """Stops renewing the lease, releases it with this worker's runs and
+        closes this worker's connection."""
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._heartbeat_task
+        await asyncio.to_thread(self._release)
+        with self._lock:
+            self._conn.close()
+
+    async def _run_heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self._lease / 3)
+            try:
+                await asyncio.to_thread(self._heartbeat)
+            except sqlite3.Error:
+                logger.exception("[SharedState] Failed to renew the worker lease.")
+
+    def _heartbeat(self) -> None:
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO workers VALUES (?, ?)", (self.worker_id, now)
+            )
+            self._expire_workers(conn, now)
+
+    def _release(self) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM runs WHERE worker_id = ?", (self.worker_id,))
+            conn.execute("DELETE FROM workers WHERE worker_id = ?", (self.worker_id,))
+
+    def _expire_workers(self, conn: sqlite3.Connection, now: float) -> None:
+        """Drops the workers whose lease expired, and their in-flight runs,
+        including runs of workers that never took a lease."""
+        expired = [
+            worker_id
+            for (worker_id,) in conn.execute(
+                "SELECT worker_id FROM workers WHERE heartbeat < ?",
+                (now - self._lease,),
+            )
+        ]
+        for worker_id in expired:
+            logger.warning(
+                "[SharedState] Lease of worker %s expired, dropping its in-flight "
+                "runs.",
+                worker_id,
+            )
+        conn.execute("DELETE FROM workers WHERE heartbeat < ?", (now - self._lease,))
+        conn.execute(
+            "DELETE FROM runs WHERE worker_id NOT IN (SELECT worker_id FROM workers)"
+        )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Runs a write transaction, taking the write lock up front so that
+        concurrent read-then-write transactions cannot deadlock."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    async def hit_rate_limit(self, key: str, window: float, limit: int) -> bool:
+        """Counts a request against a sliding-window rate limit.
+
+        Args:
+            key (str): The rate-limited resource.
+            window (float): The window length, in seconds.
+            limit (int): The maximum number of requests per window.
+
+        Returns:
+            bool: Whether the request is allowed, and was counted.
+        """
+        return await asyncio.to_thread(self._hit_rate_limit, key, window, limit)
+
+    def _hit_rate_limit(self, key: str, window: float, limit: int) -> bool:
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "DELETE FROM rate_limits WHERE key = ? AND timestamp <= ?",
+                (key, now - window),
+            )
+            (count,) = conn.execute(
+                "SELECT COUNT(*) FROM rate_limits WHERE key = ?", (key,)
+            ).fetchone()
+            if count >= limit:
+                return False
+            conn.execute(
+                "INSERT INTO rate_limits (key, timestamp) VALUES (?, ?)", (key, now)
+            )
+            return True
+
+    async def start_run(self, request_id: str, topic: str) -> None:
+        """Registers an in-flight run.
+
+        Args:
+            request_id (str): The ID of the request running it.
+            topic (str): The research topic.
+        """
+        await asyncio.to_thread(self._start_run, request_id, topic)
+
+    def _start_run(self, request_id: str, topic: str) -> None:
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?)",
+                (request_id, topic, self.worker_id, time.time()),
+            )
+
+    async def finish_run(self, request_id: str) -> None:
+        """Unregisters an in-flight run, once completed or aborted.
+
+        Args:
+            request_id (str): The ID of the request running it.
+        """
+        await asyncio.to_thread(self._finish_run, request_id)
+
+    def _finish_run(self, request_id: str) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM runs WHERE request_id = ?", (request_id,))
+
+    async def in_flight_runs(self) -> int:
+        """Returns the number of in-flight runs across all workers."""
+        return await asyncio.to_thread(self._in_flight_runs)
+
+    def _in_flight_runs(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute(
+                "SELECT COUNT(*) FROM runs JOIN workers USING (worker_id) "
+                "WHERE heartbeat >= ?",
+                (time.time() - self._lease,),
+            ).fetchone()
+        return count
+
+    async def add_result(self, data: dict[str, Any]) -> None:
+        """Shares the result of a completed run with the other workers,
+        dropping the oldest results beyond `max_results`.
+
+        Args:
+            data (dict[str, Any]): The JSON-serializable run result.
+        """
+        await asyncio.to_thread(self._add_result, json.dumps(data))
+
+    def _add_result(self, data: str) -> None:
+        with self._transaction() as conn:
+            seq = conn.execute(
+                "INSERT INTO results (worker_id, data) VALUES (?, ?)",
+                (self.worker_id, data),
+            ).lastrowid
+            conn.execute(
+                "DELETE FROM results WHERE seq <= ?", (seq - self._max_results,)
+            )
+
+    async def results_since(
+        self, seq: int, limit: int | None = None
+    ) -> list[tuple[int, dict[str, Any]]]:
+        """Returns the results other workers shared after a sequence number.
+
+        Args:
+            seq (int): The sequence number of the last result seen, 0 for all.
+            limit (int | None): Return only the most recent results, up to
+                this many, skipping older ones.
+
+        Returns:
+            list[tuple[int, dict[str, Any]]]: The sequence numbers and results,
+                oldest first.
+        """
+        return await asyncio.to_thread(self._results_since, seq, limit)
+
+    def _results_since(
+        self, seq: int, limit: int | None
+    ) -> list[tuple[int, dict[str, Any]]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, data FROM results WHERE seq > ? AND worker_id != ? "
+                "ORDER BY seq DESC LIMIT ?",
+                (seq, self.worker_id, -1 if limit is None else limit),
+            ).fetchall()
+        return [(seq, json.loads(data)) for seq, data in reversed(rows)]
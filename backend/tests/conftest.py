@@ -0,0 +1,16 @@
+import os
+
+# Placeholder credentials, so the settings load without a .env file. Tests make
+# no calls to the providers.
+for _name in (
+    "APP_API_KEY",
+    "GROQ_API_KEY",
+    "GOOGLE_API_KEY",
+    "TAVILY_API_KEY",
+    "LANGCHAIN_API_KEY",
+    "LANGCHAIN_PROJECT",
+):
+    os.environ.setdefault(_name, "test")
+os.environ.setdefault("APP_ALLOWED_ORIGINS", "http://localhost")
+os.environ.setdefault("LANGCHAIN_ENDPOINT", "http://localhost")
+os.environ["LANGCHAIN_TRACING_V2"] = "false"
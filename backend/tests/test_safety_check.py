@@ -0,0 +1,56 @@
+import asyncio
+
+from langchain_core.messages import AIMessage
+
+from benchmarks.fakes import FakeChatModel
+from src.graph.nodes import TopicSafetyCheckNode
+
+
+class _RecordingChatModel(FakeChatModel):
+    """Records the structured output each call was asked for."""
+
+    calls: list[str] = []
+
+    def _message(self, messages, tools):
+        message = super()._message(messages, tools)
+        self.calls.append(message.tool_calls[0]["name"])
+        return message
+
+
+class _SteeredChatModel(_RecordingChatModel):
+    """Flags the first topic of a batch as unsafe, as if another topic in the
+    batch steered the verdict, and clears every topic checked on its own."""
+
+    def _message(self, messages, tools):
+        message = super()._message(messages, tools)
+        call = message.tool_calls[0]
+        if call["name"] == "TopicSafetyChecks":
+            call["args"]["checks"][0].update(is_safe=False, violated_category="Hate")
+        return AIMessage(content="", tool_calls=[call])
+
+
+def _check(node: TopicSafetyCheckNode, topics: list[str]) -> list[dict]:
+    async def _run():
+        return await asyncio.gather(*(node._arun({"topic": topic}) for topic in topics))
+
+    return asyncio.run(_run())
+
+
+def test_concurrent_checks_are_batched():
+    llm = _RecordingChatModel(calls=[])
+    node = TopicSafetyCheckNode(llm=llm, batch_window=1.0, max_batch_size=3)
+
+    results = _check(node, ["solar power", "wind power", "tidal power"])
+
+    assert llm.calls == ["TopicSafetyChecks"]
+    assert all(result["is_safe"] for result in results)
+
+
+def test_mixed_batch_verdicts_are_checked_alone():
+    llm = _SteeredChatModel(calls=[])
+    node = TopicSafetyCheckNode(llm=llm, batch_window=1.0, max_batch_size=2)
+
+    results = _check(node, ["solar power", "wind power"])
+
+    assert llm.calls == ["TopicSafetyChecks", "TopicSafetyCheck", "TopicSafetyCheck"]
+    assert all(result["is_safe"] for result in results)
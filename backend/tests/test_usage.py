@@ -0,0 +1,95 @@
+import asyncio
+
+from langchain_core.messages import AIMessageChunk
+from langchain_core.outputs import ChatGenerationChunk
+from langchain_core.runnables import RunnableLambda
+
+from benchmarks.fakes import FakeChatModel
+from src.graph.cassette import CassetteChatModel
+from src.graph.llms import RoutingChatModel
+from src.graph.nodes import TopicSafetyCheckNode
+from src.graph.usage import RunUsageCollector
+
+_PRICES = {"llama-3.1-70b-versatile": (0.59, 0.79), "gemini-1.5-flash": (0.075, 0.3)}
+_USAGE = {"input_tokens": 101, "output_tokens": 11, "total_tokens": 112}
+
+
+class _UsageChatModel(FakeChatModel):
+    """Reports token usage like a provider, without naming its model."""
+
+    def _generate(self, messages, stop=None, run_manager=None, tools=None, **kwargs):
+        result = super()._generate(messages, stop, run_manager, tools, **kwargs)
+        result.generations[0].message.usage_metadata = _USAGE
+        return result
+
+    async def _astream(
+        self, messages, stop=None, run_manager=None, tools=None, **kwargs
+    ):
+        async for chunk in super()._astream(
+            messages, stop, run_manager, tools, **kwargs
+        ):
+            yield chunk
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(content="", usage_metadata=_USAGE)
+        )
+
+
+def _routed_llm() -> CassetteChatModel:
+    return CassetteChatModel(
+        llm=RoutingChatModel(
+            backends=[_UsageChatModel(), _UsageChatModel()],
+            backend_names=["groq:llama-3.1-70b-versatile", "google:gemini-1.5-flash"],
+            explore_rate=0.0,
+        ),
+        role="report",
+    )
+
+
+def test_routed_role_is_priced_when_streamed():
+    collector = RunUsageCollector(prices=_PRICES)
+
+    async def _run():
+        async for _ in _routed_llm().astream_events(
+            "Write the report.", version="v2", config={"callbacks": [collector]}
+        ):
+            pass
+
+    asyncio.run(_run())
+
+    summary = collector.summary()
+    assert summary["input_tokens"] == _USAGE["input_tokens"]
+    assert summary["cost_usd"] > 0
+
+
+def test_routed_role_is_priced_when_invoked():
+    collector = RunUsageCollector(prices=_PRICES)
+
+    asyncio.run(
+        _routed_llm().ainvoke("Write the report.", config={"callbacks": [collector]})
+    )
+
+    assert collector.summary()["cost_usd"] > 0
+
+
+def test_batched_safety_check_usage_is_split_across_runs():
+    node = TopicSafetyCheckNode(llm=_routed_llm(), batch_window=1.0, max_batch_size=2)
+    check = RunnableLambda(node._arun, name="safety_check")
+    collectors = [RunUsageCollector(prices=_PRICES) for _ in range(2)]
+
+    async def _run():
+        return await asyncio.gather(
+            *(
+                check.ainvoke({"topic": topic}, config={"callbacks": [collector]})
+                for topic, collector in zip(
+                    ["solar power", "wind power"], collectors, strict=True
+                )
+            )
+        )
+
+    results = asyncio.run(_run())
+
+    assert all(result["is_safe"] for result in results)
+    summaries = [collector.summary() for collector in collectors]
+    assert [summary["input_tokens"] for summary in summaries] == [51, 50]
+    assert [summary["output_tokens"] for summary in summaries] == [6, 5]
+    assert all(summary["cost_usd"] > 0 for summary in summaries)